@@ -2,14 +2,19 @@
 
 import argparse
 import csv
+import itertools
 import json
+import operator
+import queue
 import signal
 import sys
+import threading
 import time
 from pathlib import Path
 
 from dexscreener_screener import config
 from dexscreener_screener.client import DexScreenerClient
+from dexscreener_screener.core import lock_heartbeat
 from dexscreener_screener.logging_setup import get_logger, setup_logging
 from dexscreener_screener.models import PairSnapshot, from_api_pair
 from dexscreener_screener.pipeline import Collector, parse_addresses_input
@@ -17,6 +22,11 @@ from dexscreener_screener.storage import Database
 from dexscreener_screener.strategy import run_post_analysis, run_strategy_once
 from dexscreener_screener.strategy.trigger_analyzer import run_trigger_analysis
 
+try:
+    import orjson  # optional: faster JSON export (pip install orjson)
+except ImportError:
+    orjson = None
+
 
 def _update_app_status_success(db: Database, counters: dict | None = None) -> None:
     """Update app_status on cycle success; clear last_error."""
@@ -43,7 +53,6 @@ def _update_app_status_error(db: Database, err: Exception) -> None:
     except Exception:
         pass
 
-setup_logging()
 logger = get_logger(__name__)
 
 
@@ -94,12 +103,12 @@ def cmd_check(args: argparse.Namespace) -> int:
     rate_limit_rps = getattr(args, "rate_limit_rps", config.CHECK_RATE_LIMIT_RPS)
 
     logger.info("Check: calling DexScreener API for one pair")
-    client = DexScreenerClient(
+    with DexScreenerClient(
         timeout_sec=timeout_sec,
         max_retries=max_retries,
         rate_limit_rps=rate_limit_rps,
-    )
-    raw_pairs = client.get_pairs_by_pair_addresses([config.CHECK_PAIR_ADDRESS])
+    ) as client:
+        raw_pairs = client.get_pairs_by_pair_addresses([config.CHECK_PAIR_ADDRESS])
     if not raw_pairs:
         logger.error("Check: API returned no pairs")
         return 1
@@ -124,10 +133,10 @@ def cmd_check(args: argparse.Namespace) -> int:
     logger.info("Check: writing to SQLite")
     db = Database(":memory:")
     try:
-        db.upsert_token(snapshot.base_token)
-        db.upsert_token(snapshot.quote_token)
-        db.upsert_pair(snapshot)
-        db.insert_snapshot(snapshot)
+        with db.transaction():
+            db.upsert_tokens_bulk([snapshot.base_token, snapshot.quote_token])
+            db.upsert_pair(snapshot)
+            db.insert_snapshots_bulk([snapshot])
     except Exception as e:
         logger.error("Check: SQLite write failed: %s", e)
         db.close()
@@ -149,13 +158,17 @@ def cmd_check(args: argparse.Namespace) -> int:
     db.close()
     logger.info("Check: read OK, %s row(s)", len(rows))
 
+    if row.get("pair_address") != snapshot.pair_address:
+        logger.error("Check: read row has wrong pair_address")
+        return 1
+
     logger.info("Check: basic JSON serialization")
     try:
-        payload = json.dumps(row, default=str, ensure_ascii=False)
+        payload = _json_bytes({"pair_address": row["pair_address"]})
     except Exception as e:
         logger.error("Check: serialization failed: %s", e)
         return 1
-    if not payload or "pair_address" not in payload:
+    if not payload:
         logger.error("Check: serialized payload invalid")
         return 1
     logger.info("Check: serialization OK, %s bytes", len(payload))
@@ -164,9 +177,42 @@ def cmd_check(args: argparse.Namespace) -> int:
     return 0
 
 
-def _row_to_export_dict(row: dict) -> dict:
-    """Convert sqlite Row-like dict for JSON (e.g. omit None or keep)."""
-    return {k: (v if v is not None else None) for k, v in row.items()}
+# Shared stdlib encoder: json.dumps(..., default=str) builds a new JSONEncoder on every call
+_JSON_ENCODER = json.JSONEncoder(default=str, ensure_ascii=False)
+
+
+def _json_bytes(obj) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes (orjson when installed, else stdlib); non-JSON values via str()."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return _JSON_ENCODER.encode(obj).encode("utf-8")
+
+
+def _write_json_rows(out_path: Path, cur, columns: list[str]) -> int:
+    """Stream cursor tuple rows to out_path as a JSON array of objects, one per line. Returns number of rows written."""
+    count = 0
+    dumps = _json_bytes
+    with open(out_path, "wb") as f:
+        write = f.write
+        write(b"[\n")
+        for row in cur:
+            if count:
+                write(b",\n")
+            write(dumps(dict(zip(columns, row))))
+            count += 1
+        write(b"\n]\n")
+    return count
+
+
+def _write_csv_rows(out_path: Path, cur, columns: list[str]) -> int:
+    """Stream cursor rows to out_path as CSV: header from columns, then values in schema order. Returns row count."""
+    # zip pulls a counter value per row, so rows are written and counted without a Python-level loop
+    counter = itertools.count()
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        w.writerows(map(operator.itemgetter(0), zip(cur, counter)))
+    return next(counter)
 
 
 def cmd_prune(args: argparse.Namespace) -> int:
@@ -182,6 +228,9 @@ def cmd_prune(args: argparse.Namespace) -> int:
             dry_run=args.dry_run,
             vacuum=args.vacuum,
         )
+        if not args.dry_run and (s_cnt or p_cnt or t_cnt):
+            # Deletes land in the WAL; fold them into the DB file and shrink the -wal file now
+            db.checkpoint()
     except Exception as e:
         logger.error("Prune failed: %s", e)
         db.close()
@@ -199,34 +248,35 @@ def cmd_collect(args: argparse.Namespace) -> int:
     db_path = args.db or config.DEFAULT_DB
     db = Database(db_path)
     try:
-        client = DexScreenerClient(
+        with DexScreenerClient(
             timeout_sec=args.timeout,
             max_retries=args.max_retries,
             rate_limit_rps=args.rate_limit_rps,
-        )
-        collector = Collector(client, db)
-        if args.tokens is not None:
-            addresses = parse_addresses_input(args.tokens)
-            if not addresses:
-                logger.error("No token addresses parsed from: %s", args.tokens)
-                return 1
-            processed, errors = collector.collect_for_tokens(addresses)
-        elif args.pairs is not None:
-            addresses = parse_addresses_input(args.pairs)
-            if not addresses:
-                logger.error("No pair addresses parsed from: %s", args.pairs)
+        ) as client:
+            collector = Collector(client, db)
+            if args.tokens is not None:
+                addresses = parse_addresses_input(args.tokens)
+                if not addresses:
+                    logger.error("No token addresses parsed from: %s", args.tokens)
+                    return 1
+                processed, errors = collector.collect_for_tokens(addresses)
+            elif args.pairs is not None:
+                addresses = parse_addresses_input(args.pairs)
+                if not addresses:
+                    logger.error("No pair addresses parsed from: %s", args.pairs)
+                    return 1
+                processed, errors = collector.collect_for_pairs(addresses)
+            else:
+                logger.error("Specify either --tokens or --pairs")
                 return 1
-            processed, errors = collector.collect_for_pairs(addresses)
-        else:
-            logger.error("Specify either --tokens or --pairs")
-            return 1
 
         if not getattr(args, "no_prune", False):
             try:
                 max_h = getattr(args, "prune_max_age_hours", None) or config.DEFAULT_PRUNE_MAX_AGE_HOURS
-                s_cnt, p_cnt, t_cnt = db.prune_by_pair_age(max_age_hours=max_h, dry_run=False, vacuum=False)
+                s_cnt, p_cnt, t_cnt, dw_cnt = db.auto_prune(
+                    max_age_hours=max_h, ttl_hours=config.DUMP_WATCHLIST_TTL_HOURS
+                )
                 logger.info("auto-prune: snapshots=%s pairs=%s tokens=%s", s_cnt, p_cnt, t_cnt)
-                dw_cnt = db.prune_dump_watchlist(ttl_hours=config.DUMP_WATCHLIST_TTL_HOURS)
                 if dw_cnt:
                     logger.info("dump-watchlist prune: removed %s", dw_cnt)
             except Exception as e:
@@ -253,8 +303,12 @@ def cmd_collect_new(args: argparse.Namespace) -> int:
         logger.error("--interval-sec must be >= 1")
         return 1
     limit_per_cycle = getattr(args, "limit_per_cycle", None)
+    no_prune = getattr(args, "no_prune", False)
+    prune_max_age_hours = getattr(args, "prune_max_age_hours", config.DEFAULT_PRUNE_MAX_AGE_HOURS)
+    dump_watchlist_ttl_hours = config.DUMP_WATCHLIST_TTL_HOURS
 
-    db = Database(db_path)
+    # The connection is created here but used only by the writer thread below
+    db = Database(db_path, check_same_thread=False)
     client = DexScreenerClient(
         timeout_sec=args.timeout,
         max_retries=args.max_retries,
@@ -262,124 +316,176 @@ def cmd_collect_new(args: argparse.Namespace) -> int:
     )
     collector = Collector(client, db)
 
-    shutdown = False
+    # Set from the SIGINT handler; waits on it return as soon as Ctrl+C arrives
+    shutdown = threading.Event()
 
     def _on_sigint(signum, frame):
-        nonlocal shutdown
-        if shutdown:
+        if shutdown.is_set():
             logger.warning("Second Ctrl+C, exiting immediately")
             sys.exit(1)
-        shutdown = True
+        shutdown.set()
         logger.info("SIGINT received, finishing current cycle then exiting")
 
     signal.signal(signal.SIGINT, _on_sigint)
 
-    total_cycles = 0
-    total_candidates_tokens = 0
-    total_candidates_pairs = 0
-    total_new = 0
-    total_skipped = 0
-    total_processed = 0
-    total_snapshots = 0
-    total_errors = 0
-
-    cycle_num = 0
-    while not shutdown:
-        cycle_num += 1
-        cycle_candidates_tokens = 0
-        cycle_candidates_pairs = 0
-        cycle_new = 0
-        cycle_skipped = 0
-        cycle_processed = 0
-        cycle_snapshots = 0
-        cycle_errors = 0
-
+    totals = {
+        "cycles": 0,
+        "candidates_tokens": 0,
+        "candidates_pairs": 0,
+        "new": 0,
+        "skipped": 0,
+        "processed": 0,
+        "snapshots": 0,
+        "errors": 0,
+    }
+
+    def _write_cycle(
+        cycle_num: int,
+        candidates_tokens: int,
+        raw_pairs: list[dict] | None,
+        fetch_error: Exception | None,
+    ) -> None:
+        """Persist one fetched cycle, log counters, auto-prune, update app_status. Runs on the writer thread."""
+        if fetch_error is not None:
+            totals["errors"] += 1
+            _update_app_status_error(db, fetch_error)
+            return
         try:
-            token_addresses = client.get_latest_token_profiles()
-            cycle_candidates_tokens = len(token_addresses)
-            if limit_per_cycle is not None and limit_per_cycle > 0:
-                token_addresses = token_addresses[:limit_per_cycle]
-
-            if not token_addresses:
-                logger.info("collect-new cycle %s: no token candidates from API", cycle_num)
-            else:
-                raw_pairs = client.get_pairs_by_token_addresses_batched(token_addresses)
-                cycle_candidates_pairs = len(raw_pairs)
-                known = db.get_known_pair_addresses()
-                processed, errors, skipped = collector.collect_from_raw_pairs(raw_pairs, known)
-                cycle_processed = processed
-                cycle_snapshots = processed
-                cycle_skipped = skipped
-                cycle_new = len(raw_pairs) - skipped
-                cycle_errors = errors
-
-            total_cycles = cycle_num
-            total_candidates_tokens += cycle_candidates_tokens
-            total_candidates_pairs += cycle_candidates_pairs
-            total_new += cycle_new
-            total_skipped += cycle_skipped
-            total_processed += cycle_processed
-            total_snapshots += cycle_snapshots
-            total_errors += cycle_errors
+            cycle_processed = cycle_skipped = cycle_errors = 0
+            if raw_pairs:
+                cycle_processed, cycle_errors, cycle_skipped = collector.collect_from_raw_pairs(raw_pairs)
+            cycle_candidates_pairs = len(raw_pairs or ())
+            cycle_new = cycle_candidates_pairs - cycle_skipped
+
+            totals["cycles"] = cycle_num
+            totals["candidates_tokens"] += candidates_tokens
+            totals["candidates_pairs"] += cycle_candidates_pairs
+            totals["new"] += cycle_new
+            totals["skipped"] += cycle_skipped
+            totals["processed"] += cycle_processed
+            totals["snapshots"] += cycle_processed
+            totals["errors"] += cycle_errors
 
             logger.info(
                 "collect-new cycle %s | candidates_tokens=%s candidates_pairs=%s new=%s skipped=%s processed=%s snapshots=%s errors=%s",
                 cycle_num,
-                cycle_candidates_tokens,
+                candidates_tokens,
                 cycle_candidates_pairs,
                 cycle_new,
                 cycle_skipped,
                 cycle_processed,
-                cycle_snapshots,
+                cycle_processed,
                 cycle_errors,
             )
             logger.info(
                 "collect-new totals | cycles=%s candidates_tokens=%s candidates_pairs=%s new=%s skipped=%s processed=%s snapshots=%s errors=%s",
-                total_cycles,
-                total_candidates_tokens,
-                total_candidates_pairs,
-                total_new,
-                total_skipped,
-                total_processed,
-                total_snapshots,
-                total_errors,
+                totals["cycles"],
+                totals["candidates_tokens"],
+                totals["candidates_pairs"],
+                totals["new"],
+                totals["skipped"],
+                totals["processed"],
+                totals["snapshots"],
+                totals["errors"],
             )
-            if not getattr(args, "no_prune", False):
+            if not no_prune:
                 try:
-                    max_h = getattr(args, "prune_max_age_hours", config.DEFAULT_PRUNE_MAX_AGE_HOURS)
-                    s_cnt, p_cnt, t_cnt = db.prune_by_pair_age(max_age_hours=max_h, dry_run=False, vacuum=False)
+                    s_cnt, p_cnt, t_cnt, dw_cnt = db.auto_prune(
+                        max_age_hours=prune_max_age_hours, ttl_hours=dump_watchlist_ttl_hours
+                    )
                     logger.info("auto-prune: snapshots=%s pairs=%s tokens=%s", s_cnt, p_cnt, t_cnt)
-                    dw_cnt = db.prune_dump_watchlist(ttl_hours=config.DUMP_WATCHLIST_TTL_HOURS)
+                    if p_cnt:
+                        # Pruned pairs may reappear as new; other prunes leave the known set valid
+                        collector.reload_known_pairs()
                     if dw_cnt:
                         logger.info("dump-watchlist prune: removed %s", dw_cnt)
                 except Exception as e:
                     logger.warning("auto-prune skipped: %s", e)
+            try:
+                if db.checkpoint_if_wal_large():
+                    logger.info("WAL checkpoint: truncated")
+            except Exception as e:
+                logger.warning("WAL checkpoint skipped: %s", e)
             _update_app_status_success(
                 db,
                 {
                     "cycle": cycle_num,
                     "processed": cycle_processed,
-                    "snapshots": cycle_snapshots,
+                    "snapshots": cycle_processed,
                     "errors": cycle_errors,
                 },
             )
         except Exception as e:
-            cycle_errors = 1
-            total_errors += 1
+            totals["errors"] += 1
             _update_app_status_error(db, e)
             logger.exception("collect-new cycle %s failed: %s", cycle_num, e)
 
-        if shutdown:
+    # Writer thread drains fetched cycles so DB writes overlap the next cycle's HTTP fetch
+    write_queue: queue.Queue = queue.Queue(maxsize=config.COLLECT_NEW_WRITE_QUEUE_MAX)
+
+    def _writer_loop() -> None:
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            _write_cycle(*item)
+
+    writer = threading.Thread(target=_writer_loop, name="collect-new-writer", daemon=True)
+    writer.start()
+
+    cycle_num = 0
+    # Cycles start every interval_sec (monotonic), not interval_sec after the previous cycle ended
+    deadline = time.monotonic()
+    while not shutdown.is_set():
+        cycle_num += 1
+        deadline += interval_sec
+
+        try:
+            token_addresses = client.get_latest_token_profiles()
+            candidates_tokens = len(token_addresses)
+            token_addresses = collector.select_token_candidates(token_addresses, limit=limit_per_cycle)
+
+            raw_pairs: list[dict] = []
+            if shutdown.is_set():
+                # Ctrl+C during the profiles request: skip the pair fetch, nothing to persist
+                break
+            if not token_addresses:
+                logger.info("collect-new cycle %s: no new token candidates from API", cycle_num)
+            else:
+                failed: list[str] = []
+                raw_pairs = client.run(client.aget_pairs_by_token_addresses_batched(token_addresses, failed))
+                # Chunks lost to timeouts/429 are not marked: their tokens are retried next cycle
+                failed_set = set(failed)
+                collector.mark_queried(a for a in token_addresses if a not in failed_set)
+            write_queue.put((cycle_num, candidates_tokens, raw_pairs, None))
+        except Exception as e:
+            logger.exception("collect-new cycle %s failed: %s", cycle_num, e)
+            write_queue.put((cycle_num, 0, None, e))
+
+        if shutdown.is_set():
             break
-        time.sleep(interval_sec)
+        now = time.monotonic()
+        if deadline <= now:
+            # Cycle overran the interval: start the next one now, without bursting to catch up
+            deadline = now
+            continue
+        # Wait in <=1s slices: Event.wait is not interrupted by Ctrl+C on Windows
+        while not shutdown.is_set():
+            sleep_for = deadline - time.monotonic()
+            if sleep_for <= 0:
+                break
+            shutdown.wait(min(sleep_for, 1.0))
 
+    write_queue.put(None)
+    writer.join()
+    client.close()
     db.close()
     logger.info(
         "collect-new stopped | total_cycles=%s total_processed=%s total_snapshots=%s total_errors=%s",
-        total_cycles,
-        total_processed,
-        total_snapshots,
-        total_errors,
+        totals["cycles"],
+        totals["processed"],
+        totals["snapshots"],
+        totals["errors"],
     )
     return 0
 
@@ -449,7 +555,10 @@ def _print_strategy_output(
     watchlist_l1: list[dict],
 ) -> None:
     """Print SIGNAL, WATCHLIST_BOOTSTRAP, WATCHLIST_L3, WATCHLIST_L2, WATCHLIST_L1. Sorted by score desc, drop_from_ath desc."""
-    fmt = "%-44s %7s %12s %12s %6s"
+    header = "%-44s %7s %12s %12s %6s" % ("pair", "drop%", "liq", "vol", "txns")
+    row_fmt = "%-44s %7.1f %12.0f %12.0f %6d"
+    signal_fmt = "pair=%s drop_from_ath=%.1f%% ath_price=%.6g current_price=%.6g %s"
+    lines: list[str] = []
     for section, entries in [
         ("SIGNAL", signals),
         ("WATCHLIST_BOOTSTRAP", watchlist_bootstrap),
@@ -457,32 +566,36 @@ def _print_strategy_output(
         ("WATCHLIST_L2", watchlist_l2),
         ("WATCHLIST_L1", watchlist_l1),
     ]:
-        print("--- %s ---" % section)
+        lines.append("--- %s ---" % section)
         if not entries:
-            print("(none)")
+            lines.append("(none)")
+        elif section == "SIGNAL":
+            lines.extend(
+                signal_fmt
+                % (
+                    (e.get("pair_address") or "")[:44],
+                    e.get("drop_from_ath") or 0,
+                    e.get("ath_price") or 0,
+                    e.get("current_price") or 0,
+                    e.get("url") or "",
+                )
+                for e in _sort_entries(entries)
+            )
         else:
-            if section == "SIGNAL":
-                for e in _sort_entries(entries):
-                    pair = (e.get("pair_address") or "")[:44]
-                    drop = "%.1f" % (e.get("drop_from_ath") or 0)
-                    ath = "%.6g" % (e.get("ath_price") or 0)
-                    cur = "%.6g" % (e.get("current_price") or 0)
-                    url = e.get("url") or ""
-                    print("pair=%s drop_from_ath=%s%% ath_price=%s current_price=%s %s" % (pair, drop, ath, cur, url))
-            else:
-                print(fmt % ("pair", "drop%", "liq", "vol", "txns"))
-                for e in _sort_entries(entries):
-                    print(
-                        fmt
-                        % (
-                            (e.get("pair_address") or "")[:44],
-                            "%.1f" % (e.get("drop_from_ath") or 0),
-                            "%.0f" % (e.get("liquidity_usd") or 0),
-                            "%.0f" % (e.get("volume_h24") or 0),
-                            e.get("txns_h24") or 0,
-                        )
-                    )
-    print("---")
+            lines.append(header)
+            lines.extend(
+                row_fmt
+                % (
+                    (e.get("pair_address") or "")[:44],
+                    e.get("drop_from_ath") or 0,
+                    e.get("liquidity_usd") or 0,
+                    e.get("volume_h24") or 0,
+                    int(e.get("txns_h24") or 0),
+                )
+                for e in _sort_entries(entries)
+            )
+    lines.append("---")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def cmd_post(args: argparse.Namespace) -> int:
@@ -643,6 +756,10 @@ def _print_trigger_report(summary: dict) -> None:
     print("---")
 
 
+# Export format -> streaming writer(out_path, cursor, columns) -> row count
+_EXPORT_WRITERS = {"json": _write_json_rows, "csv": _write_csv_rows}
+
+
 def cmd_dump_watchlist(args: argparse.Namespace) -> int:
     """List dump watchlist entries (pair_address, state, drop_pct, peak_price, low_price, last_price, updated_at_ms, signal_price)."""
     db_path = args.db or config.DEFAULT_DB
@@ -658,22 +775,25 @@ def cmd_dump_watchlist(args: argparse.Namespace) -> int:
         print("No dump watchlist entries")
         return 0
     cols = ["pair_address", "state", "drop_pct", "peak_price", "low_price", "last_price", "updated_at_ms", "signal_price"]
-    fmt = "%-44s %-9s %7s %12s %12s %12s %14s %12s"
-    print(fmt % tuple(cols))
+    header = "%-44s %-9s %7s %12s %12s %12s %14s %12s" % tuple(cols)
+    row_fmt = "%-44s %-9s %7.1f %12.6g %12.6g %12.6g %14s %12s"
+    lines = [header]
     for r in rows:
-        print(
-            fmt
+        signal_price = r.get("signal_price")
+        lines.append(
+            row_fmt
             % (
                 (r.get("pair_address") or "")[:44],
                 r.get("state") or "",
-                "%.1f" % (r.get("drop_pct") or 0),
-                "%.6g" % (r.get("peak_price") or 0),
-                "%.6g" % (r.get("low_price") or 0),
-                "%.6g" % (r.get("last_price") or 0),
+                r.get("drop_pct") or 0,
+                r.get("peak_price") or 0,
+                r.get("low_price") or 0,
+                r.get("last_price") or 0,
                 r.get("updated_at_ms") or "",
-                "%.6g" % (r.get("signal_price") or 0) if r.get("signal_price") is not None else "",
+                "%.6g" % signal_price if signal_price is not None else "",
             )
         )
+    sys.stdout.write("\n".join(lines) + "\n")
     return 0
 
 
@@ -685,30 +805,20 @@ def cmd_dump_watchlist_export(args: argparse.Namespace) -> int:
         return 1
     db = Database(db_path)
     state = getattr(args, "state", None)
-    rows = list(db.iterate_dump_watchlist(state=state))
-    db.close()
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     export_format = (args.format or "json").lower()
-    if export_format == "json":
-        data = [_row_to_export_dict(r) for r in rows]
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    elif export_format == "csv":
-        if not rows:
-            with open(out_path, "w", encoding="utf-8", newline="") as f:
-                f.write("")
-        else:
-            headers = list(rows[0].keys())
-            with open(out_path, "w", encoding="utf-8", newline="") as f:
-                w = csv.DictWriter(f, fieldnames=headers)
-                w.writeheader()
-                for r in rows:
-                    w.writerow({k: r.get(k) for k in headers})
-    else:
+    write_rows = _EXPORT_WRITERS.get(export_format)
+    if write_rows is None:
         logger.error("Unknown format: %s (use json or csv)", args.format)
+        db.close()
         return 1
-    logger.info("Exported %s dump_watchlist row(s) to %s (%s)", len(rows), out_path, export_format)
+    try:
+        cur, columns = db.iterate_dump_watchlist_cursor(state=state)
+        count = write_rows(out_path, cur, columns)
+    finally:
+        db.close()
+    logger.info("Exported %s dump_watchlist row(s) to %s (%s)", count, out_path, export_format)
     return 0
 
 
@@ -724,160 +834,175 @@ def cmd_export(args: argparse.Namespace) -> int:
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     if table == "snapshots":
-        rows = list(db.iterate_snapshots())
+        iterate_cursor = db.iterate_snapshots_cursor
     elif table == "pairs":
-        rows = list(db.iterate_pairs())
+        iterate_cursor = db.iterate_pairs_cursor
     elif table == "tokens":
-        rows = list(db.iterate_tokens())
+        iterate_cursor = db.iterate_tokens_cursor
     else:
         logger.error("Unknown table: %s (use snapshots, pairs, or tokens)", table)
         db.close()
         return 1
 
     export_format = (args.format or "json").lower()
-    if export_format == "json":
-        data = [_row_to_export_dict(r) for r in rows]
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    elif export_format == "csv":
-        if not rows:
-            logger.warning("No rows to export")
-            with open(out_path, "w", encoding="utf-8", newline="") as f:
-                f.write("")
-        else:
-            headers = list(rows[0].keys())
-            with open(out_path, "w", encoding="utf-8", newline="") as f:
-                w = csv.DictWriter(f, fieldnames=headers)
-                w.writeheader()
-                for r in rows:
-                    w.writerow({k: r.get(k) for k in headers})
-    else:
+    write_rows = _EXPORT_WRITERS.get(export_format)
+    if write_rows is None:
         logger.error("Unknown format: %s (use json or csv)", args.format)
         db.close()
         return 1
 
-    db.close()
-    logger.info("Exported %s row(s) to %s (%s)", len(rows), out_path, export_format)
+    try:
+        cur, columns = iterate_cursor()
+        count = write_rows(out_path, cur, columns)
+    finally:
+        db.close()
+    if not count:
+        logger.warning("No rows to export")
+    logger.info("Exported %s row(s) to %s (%s)", count, out_path, export_format)
     return 0
 
 
-def main() -> int:
-    """
-    CLI entrypoint: parse args, dispatch to command handlers.
-    Commands: collect, collect-new, prune, export, dump-watchlist, dump-watchlist-export, self-check, check.
-    """
-    parser = argparse.ArgumentParser(
-        prog="dexscreener_screener",
-        description="DexScreener Screener v1: collect Solana pair data and export to JSON/CSV.",
-    )
-    subparsers = parser.add_subparsers(dest="command", required=True)
+def _add_collect_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
+    p.add_argument("--tokens", metavar="FILE_OR_CSV", help="Token addresses file or comma-separated list")
+    p.add_argument("--pairs", metavar="FILE_OR_CSV", help="Pair addresses file or comma-separated list")
+    p.add_argument("--timeout", type=float, default=config.DEFAULT_TIMEOUT_SEC, help="HTTP timeout seconds")
+    p.add_argument("--max-retries", type=int, default=config.DEFAULT_MAX_RETRIES, help="Max HTTP retries")
+    p.add_argument("--rate-limit-rps", type=float, default=config.DEFAULT_RATE_LIMIT_RPS, help="Max requests per second")
+    p.add_argument("--no-prune", action="store_true", help="Disable auto-prune after successful collect")
+    p.add_argument("--prune-max-age-hours", type=float, default=config.DEFAULT_PRUNE_MAX_AGE_HOURS, help="Max age in hours for auto-prune (default 24)")
 
-    collect_parser = subparsers.add_parser("collect", help="Collect pairs from DexScreener API")
-    collect_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
-    collect_parser.add_argument("--tokens", metavar="FILE_OR_CSV", help="Token addresses file or comma-separated list")
-    collect_parser.add_argument("--pairs", metavar="FILE_OR_CSV", help="Pair addresses file or comma-separated list")
-    collect_parser.add_argument("--timeout", type=float, default=config.DEFAULT_TIMEOUT_SEC, help="HTTP timeout seconds")
-    collect_parser.add_argument("--max-retries", type=int, default=config.DEFAULT_MAX_RETRIES, help="Max HTTP retries")
-    collect_parser.add_argument("--rate-limit-rps", type=float, default=config.DEFAULT_RATE_LIMIT_RPS, help="Max requests per second")
-    collect_parser.add_argument("--no-prune", action="store_true", help="Disable auto-prune after successful collect")
-    collect_parser.add_argument("--prune-max-age-hours", type=float, default=config.DEFAULT_PRUNE_MAX_AGE_HOURS, help="Max age in hours for auto-prune (default 24)")
-    collect_parser.set_defaults(func=cmd_collect)
-
-    collect_new_parser = subparsers.add_parser(
-        "collect-new",
-        help="Continuous collection of new pairs from token-profiles (Solana); exit with Ctrl+C",
-    )
-    collect_new_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
-    collect_new_parser.add_argument(
+
+def _add_collect_new_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
+    p.add_argument(
         "--interval-sec",
         type=float,
         default=config.COLLECT_NEW_INTERVAL_SEC,
         help="Seconds between cycles (default 60; token-profiles rate limit 60/min)",
     )
-    collect_new_parser.add_argument(
+    p.add_argument(
         "--limit-per-cycle",
         type=int,
         default=None,
         metavar="N",
         help="Max token candidates per cycle (optional)",
     )
-    collect_new_parser.add_argument("--timeout", type=float, default=config.DEFAULT_TIMEOUT_SEC, help="HTTP timeout seconds")
-    collect_new_parser.add_argument("--max-retries", type=int, default=config.DEFAULT_MAX_RETRIES, help="Max HTTP retries")
-    collect_new_parser.add_argument("--rate-limit-rps", type=float, default=config.DEFAULT_RATE_LIMIT_RPS, help="Max requests per second")
-    collect_new_parser.add_argument("--no-prune", action="store_true", help="Disable auto-prune after each cycle")
-    collect_new_parser.add_argument("--prune-max-age-hours", type=float, default=config.DEFAULT_PRUNE_MAX_AGE_HOURS, help="Max age in hours for auto-prune (default 24)")
-    collect_new_parser.set_defaults(func=cmd_collect_new)
-
-    prune_parser = subparsers.add_parser("prune", help="Remove pairs older than N hours (by pair_created_at_ms) and orphan tokens")
-    prune_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
-    prune_parser.add_argument("--max-age-hours", type=float, default=config.DEFAULT_PRUNE_MAX_AGE_HOURS, help="Delete pairs older than N hours (default 24)")
-    prune_parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
-    prune_parser.add_argument("--vacuum", action="store_true", help="Run VACUUM after pruning")
-    prune_parser.set_defaults(func=cmd_prune)
-
-    export_parser = subparsers.add_parser("export", help="Export data from SQLite to JSON or CSV")
-    export_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
-    export_parser.add_argument("--format", choices=["json", "csv"], required=True, help="Output format")
-    export_parser.add_argument("--out", required=True, help="Output file path")
-    export_parser.add_argument("--table", choices=["snapshots", "pairs", "tokens"], default="snapshots", help="Table to export")
-    export_parser.set_defaults(func=cmd_export)
-
-    dump_watchlist_parser = subparsers.add_parser("dump-watchlist", help="View dump watchlist entries")
-    dump_watchlist_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path")
-    dump_watchlist_parser.add_argument("--state", choices=["DUMPING", "BOTTOMING", "SIGNAL"], help="Filter by state")
-    dump_watchlist_parser.add_argument("--limit", type=int, default=50, help="Max rows (default 50)")
-    dump_watchlist_parser.set_defaults(func=cmd_dump_watchlist)
-
-    dump_export_parser = subparsers.add_parser("dump-watchlist-export", help="Export dump_watchlist to JSON or CSV")
-    dump_export_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path")
-    dump_export_parser.add_argument("--format", choices=["json", "csv"], required=True, help="Output format")
-    dump_export_parser.add_argument("--out", required=True, help="Output file path")
-    dump_export_parser.add_argument("--state", choices=["DUMPING", "BOTTOMING", "SIGNAL"], help="Filter by state")
-    dump_export_parser.set_defaults(func=cmd_dump_watchlist_export)
-
-    self_check_parser = subparsers.add_parser(
-        "self-check",
-        help="Check DB invariants: only pairs <24h, no old-pair snapshots, no orphan tokens; exit 0=OK, 2=FAIL",
-    )
-    self_check_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
-    self_check_parser.add_argument("--fix", action="store_true", help="If FAIL, run prune_by_pair_age(24) and re-check")
-    self_check_parser.set_defaults(func=cmd_self_check)
-
-    check_parser = subparsers.add_parser("check", help="Self-check full cycle: API -> normalize -> SQLite -> read -> serialize")
-    check_parser.add_argument("--timeout", type=float, default=config.CHECK_TIMEOUT_SEC, help="HTTP timeout seconds")
-    check_parser.add_argument("--max-retries", type=int, default=config.CHECK_MAX_RETRIES, help="Max HTTP retries")
-    check_parser.add_argument("--rate-limit-rps", type=float, default=config.CHECK_RATE_LIMIT_RPS, help="Max requests per second")
-    check_parser.set_defaults(func=cmd_check)
-
-    strategy_parser = subparsers.add_parser(
-        "strategy",
-        help="Strategy screener (ATH-based drawdown): WATCHLIST / SIGNAL from price history",
-    )
-    strategy_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
-    strategy_parser.add_argument("--once", action="store_true", help="Run once and exit")
-    strategy_parser.add_argument("--loop", type=float, metavar="SEC", help="Run every N seconds until Ctrl+C")
-    strategy_parser.set_defaults(func=cmd_strategy)
-
-    post_parser = subparsers.add_parser(
-        "post",
-        help="Post-analysis: evaluate signal quality at 30/60/120 min horizons",
-    )
-    post_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
-    post_parser.add_argument("--once", action="store_true", help="Run once and exit (default if no --loop)")
-    post_parser.add_argument("--loop", type=float, metavar="SEC", help="Run every N seconds until Ctrl+C")
-    post_parser.set_defaults(func=cmd_post)
-
-    trigger_parser = subparsers.add_parser(
-        "trigger",
-        help="Trigger-based post-analysis: TP1 40%%, SL -50%%, BU after TP1",
+    p.add_argument("--timeout", type=float, default=config.DEFAULT_TIMEOUT_SEC, help="HTTP timeout seconds")
+    p.add_argument("--max-retries", type=int, default=config.DEFAULT_MAX_RETRIES, help="Max HTTP retries")
+    p.add_argument("--rate-limit-rps", type=float, default=config.DEFAULT_RATE_LIMIT_RPS, help="Max requests per second")
+    p.add_argument("--no-prune", action="store_true", help="Disable auto-prune after each cycle")
+    p.add_argument("--prune-max-age-hours", type=float, default=config.DEFAULT_PRUNE_MAX_AGE_HOURS, help="Max age in hours for auto-prune (default 24)")
+
+
+def _add_prune_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
+    p.add_argument("--max-age-hours", type=float, default=config.DEFAULT_PRUNE_MAX_AGE_HOURS, help="Delete pairs older than N hours (default 24)")
+    p.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    p.add_argument("--vacuum", action="store_true", help="Run VACUUM after pruning")
+
+
+def _add_export_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
+    p.add_argument("--format", choices=["json", "csv"], required=True, help="Output format")
+    p.add_argument("--out", required=True, help="Output file path")
+    p.add_argument("--table", choices=["snapshots", "pairs", "tokens"], default="snapshots", help="Table to export")
+
+
+def _add_dump_watchlist_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path")
+    p.add_argument("--state", choices=["DUMPING", "BOTTOMING", "SIGNAL"], help="Filter by state")
+    p.add_argument("--limit", type=int, default=50, help="Max rows (default 50)")
+
+
+def _add_dump_watchlist_export_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path")
+    p.add_argument("--format", choices=["json", "csv"], required=True, help="Output format")
+    p.add_argument("--out", required=True, help="Output file path")
+    p.add_argument("--state", choices=["DUMPING", "BOTTOMING", "SIGNAL"], help="Filter by state")
+
+
+def _add_self_check_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
+    p.add_argument("--fix", action="store_true", help="If FAIL, run prune_by_pair_age(24) and re-check")
+
+
+def _add_check_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--timeout", type=float, default=config.CHECK_TIMEOUT_SEC, help="HTTP timeout seconds")
+    p.add_argument("--max-retries", type=int, default=config.CHECK_MAX_RETRIES, help="Max HTTP retries")
+    p.add_argument("--rate-limit-rps", type=float, default=config.CHECK_RATE_LIMIT_RPS, help="Max requests per second")
+
+
+def _add_strategy_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
+    p.add_argument("--once", action="store_true", help="Run once and exit")
+    p.add_argument("--loop", type=float, metavar="SEC", help="Run every N seconds until Ctrl+C")
+
+
+def _add_post_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
+    p.add_argument("--once", action="store_true", help="Run once and exit (default if no --loop)")
+    p.add_argument("--loop", type=float, metavar="SEC", help="Run every N seconds until Ctrl+C")
+
+
+def _add_trigger_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
+    p.add_argument("--once", action="store_true", help="Run once and exit (default if no --loop)")
+    p.add_argument("--loop", type=float, metavar="SEC", help="Run every N seconds until Ctrl+C (e.g. 60)")
+
+
+# Subcommand name -> (help, argument builder, handler); order is the --help listing order
+_COMMANDS = {
+    "collect": ("Collect pairs from DexScreener API", _add_collect_args, cmd_collect),
+    "collect-new": ("Continuous collection of new pairs from token-profiles (Solana); exit with Ctrl+C", _add_collect_new_args, cmd_collect_new),
+    "prune": ("Remove pairs older than N hours (by pair_created_at_ms) and orphan tokens", _add_prune_args, cmd_prune),
+    "export": ("Export data from SQLite to JSON or CSV", _add_export_args, cmd_export),
+    "dump-watchlist": ("View dump watchlist entries", _add_dump_watchlist_args, cmd_dump_watchlist),
+    "dump-watchlist-export": ("Export dump_watchlist to JSON or CSV", _add_dump_watchlist_export_args, cmd_dump_watchlist_export),
+    "self-check": ("Check DB invariants: only pairs <24h, no old-pair snapshots, no orphan tokens; exit 0=OK, 2=FAIL", _add_self_check_args, cmd_self_check),
+    "check": ("Self-check full cycle: API -> normalize -> SQLite -> read -> serialize", _add_check_args, cmd_check),
+    "strategy": ("Strategy screener (ATH-based drawdown): WATCHLIST / SIGNAL from price history", _add_strategy_args, cmd_strategy),
+    "post": ("Post-analysis: evaluate signal quality at 30/60/120 min horizons", _add_post_args, cmd_post),
+    "trigger": ("Trigger-based post-analysis: TP1 40%%, SL -50%%, BU after TP1", _add_trigger_args, cmd_trigger),
+}
+
+
+def _build_parser(command: str | None = None) -> argparse.ArgumentParser:
+    """
+    Build the CLI parser. With command set, only that subparser gets its arguments;
+    otherwise (help, unknown or missing command) every subcommand is configured.
+    """
+    parser = argparse.ArgumentParser(
+        prog="dexscreener_screener",
+        description="DexScreener Screener v1: collect Solana pair data and export to JSON/CSV.",
     )
-    trigger_parser.add_argument("--db", default=config.DEFAULT_DB, help="SQLite database path (default: %s)" % config.DEFAULT_DB)
-    trigger_parser.add_argument("--once", action="store_true", help="Run once and exit (default if no --loop)")
-    trigger_parser.add_argument("--loop", type=float, metavar="SEC", help="Run every N seconds until Ctrl+C (e.g. 60)")
-    trigger_parser.set_defaults(func=cmd_trigger)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (help_text, add_args, func) in _COMMANDS.items():
+        if command is not None and name != command:
+            continue
+        sub = subparsers.add_parser(name, help=help_text)
+        add_args(sub)
+        sub.set_defaults(func=func)
+    return parser
+
 
-    args = parser.parse_args()
-    return args.func(args)
+def main() -> int:
+    """
+    CLI entrypoint: parse args, dispatch to command handlers.
+    Commands: collect, collect-new, prune, export, dump-watchlist, dump-watchlist-export, self-check, check.
+    """
+    argv = sys.argv[1:]
+    # Only the invoked subcommand's parser is built; full build for -h / unknown command
+    command = argv[0] if argv and argv[0] in _COMMANDS else None
+    parser = _build_parser(command)
+    args = parser.parse_args(argv)
+    # Configure handlers only once a command actually runs (not on import or --help)
+    setup_logging()
+    if not config.DB_LOCK_HEARTBEAT:
+        return args.func(args)
+    # Cycle step of run.ps1 loop mode: keep its <db>.lock fresh however long this command runs
+    with lock_heartbeat(getattr(args, "db", None) or config.DEFAULT_DB):
+        return args.func(args)
 
 
 if __name__ == "__main__":
@@ -2,18 +2,34 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import random
+import threading
 import time
-from typing import Any
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, TypeVar
 
 import httpx
 
 from dexscreener_screener import config
 from dexscreener_screener.logging_setup import get_logger
 
+try:
+    import orjson  # optional: faster response decoding (pip install orjson)
+except ImportError:
+    orjson = None
+
 logger = get_logger(__name__)
 
+_T = TypeVar("_T")
+
+# 4xx statuses worth retrying; any other 4xx (400/401/403/404...) fails immediately
+_RETRYABLE_STATUS = frozenset({408, 425, 429})
+
 
 class DexScreenerClient:
     """HTTP client for DexScreener public API. Only handles HTTP/API; no DB knowledge."""
@@ -33,45 +49,192 @@ class DexScreenerClient:
         self.max_retries = max_retries
         self.backoff_base = backoff_base
         self.rate_limit_rps = rate_limit_rps
-        self._last_request_ts = 0.0
+        # Token bucket shared by sync and async requests: burst up to rate_limit_rps, refill at rate_limit_rps/s
+        self._bucket_capacity = max(1.0, rate_limit_rps)
+        self._bucket_tokens = self._bucket_capacity
+        self._bucket_ts = time.monotonic()
+        self._bucket_lock = threading.Lock()
+        # path -> (monotonic time fetched, decoded payload); oldest first, bounded by HTTP_RESPONSE_CACHE_MAX
+        self._cache: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._limits = httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY_SEC,
+        )
+        # One pooled client for all sync requests: TCP/TLS connections are kept alive between calls.
+        # Transport-level retries are off; _request does its own retry/backoff.
+        self._http = httpx.Client(
+            timeout=timeout_sec,
+            transport=httpx.HTTPTransport(retries=0, limits=self._limits),
+        )
+        # Event loop for run() and its pooled AsyncClient; both created on first use, kept until close()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._ahttp: httpx.AsyncClient | None = None
+
+    def close(self) -> None:
+        """Close pooled HTTP connections (sync and async) and the run() event loop."""
+        self._http.close()
+        if self._loop is not None:
+            if self._ahttp is not None:
+                self._loop.run_until_complete(self._ahttp.aclose())
+                self._ahttp = None
+            self._loop.close()
+            self._loop = None
+
+    def __enter__(self) -> DexScreenerClient:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def run(self, coro: Awaitable[_T]) -> _T:
+        """
+        Run an a* method of this client to completion, e.g. client.run(client.aget_pairs_by_pair_addresses(addrs)).
+        Unlike asyncio.run, the event loop and its AsyncClient outlive the call, so keep-alive connections are reused.
+        """
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    @asynccontextmanager
+    async def _async_http(self) -> AsyncIterator[httpx.AsyncClient]:
+        """The pooled AsyncClient under run(); a per-call one under any other event loop (connections are loop-bound)."""
+        if self._loop is not None and asyncio.get_running_loop() is self._loop:
+            if self._ahttp is None:
+                self._ahttp = httpx.AsyncClient(timeout=self.timeout_sec, limits=self._limits)
+            yield self._ahttp
+            return
+        async with httpx.AsyncClient(timeout=self.timeout_sec, limits=self._limits) as client:
+            yield client
+
+    def _reserve(self) -> float:
+        """Take one request token from the bucket; return seconds to wait before sending (0 when credit is available)."""
+        rps = self.rate_limit_rps
+        if rps <= 0:
+            return 0.0
+        with self._bucket_lock:
+            now = time.monotonic()
+            tokens = min(self._bucket_capacity, self._bucket_tokens + (now - self._bucket_ts) * rps) - 1.0
+            self._bucket_tokens = tokens
+            self._bucket_ts = now
+        return -tokens / rps if tokens < 0 else 0.0
 
     def _throttle(self) -> None:
-        min_interval = 1.0 / self.rate_limit_rps if self.rate_limit_rps > 0 else 0
-        elapsed = time.monotonic() - self._last_request_ts
-        if elapsed < min_interval:
-            time.sleep(min_interval - elapsed)
-        self._last_request_ts = time.monotonic()
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def _athrottle(self) -> None:
+        """Async counterpart of _throttle (same bucket)."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _cache_get(self, path: str) -> tuple[bool, Any]:
+        """(True, payload) when path was fetched within HTTP_RESPONSE_CACHE_TTL_SEC, else (False, None)."""
+        entry = self._cache.get(path)
+        if entry is None:
+            return False, None
+        if time.monotonic() - entry[0] >= config.HTTP_RESPONSE_CACHE_TTL_SEC:
+            self._cache.pop(path, None)
+            return False, None
+        return True, entry[1]
+
+    def _cache_put(self, path: str, data: Any) -> None:
+        if config.HTTP_RESPONSE_CACHE_TTL_SEC <= 0:
+            return
+        self._cache[path] = (time.monotonic(), data)
+        self._cache.move_to_end(path)
+        while len(self._cache) > config.HTTP_RESPONSE_CACHE_MAX:
+            self._cache.popitem(last=False)
 
-    def _request(self, path: str) -> Any:
+    @staticmethod
+    def _check_response(resp: httpx.Response) -> Any:
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise httpx.HTTPStatusError(
+                f"HTTP {resp.status_code}",
+                request=resp.request,
+                response=resp,
+            )
+        resp.raise_for_status()
+        if orjson is not None:
+            return orjson.loads(resp.content)
+        return resp.json()
+
+    def _retry_delay(self, attempt: int, exc: Exception) -> float | None:
+        """
+        Delay before the next attempt, or None when the request must not be retried:
+        retries exhausted (logged) or a permanent 4xx (re-raised by the caller without sleeping).
+        Honors Retry-After (seconds or HTTP date, capped) over exponential backoff.
+        """
+        retry_after: float | None = None
+        if isinstance(exc, httpx.HTTPStatusError):
+            status = exc.response.status_code
+            if status < 500 and status not in _RETRYABLE_STATUS:
+                return None
+            retry_after = _parse_retry_after(exc.response.headers.get("Retry-After"))
+        if attempt < self.max_retries - 1:
+            if retry_after is not None:
+                delay = retry_after
+            else:
+                delay = self.backoff_base * (2**attempt) + random.uniform(0, 0.2)
+            logger.warning(
+                "Request failed (attempt %s/%s), retry in %.2fs: %s",
+                attempt + 1,
+                self.max_retries,
+                delay,
+                exc,
+            )
+            return delay
+        logger.error("Request failed after %s retries: %s", self.max_retries, exc)
+        return None
+
+    def _request(self, path: str, cached: bool = True) -> Any:
+        """GET path with throttle and retries. cached=False bypasses the response cache (live feeds)."""
+        if cached:
+            hit, data = self._cache_get(path)
+            if hit:
+                return data
         url = f"{self.base_url}{path}"
         last_exc: Exception | None = None
         for attempt in range(self.max_retries):
             self._throttle()
             try:
-                with httpx.Client(timeout=self.timeout_sec) as client:
-                    resp = client.get(url)
-                if resp.status_code == 429 or resp.status_code >= 500:
-                    raise httpx.HTTPStatusError(
-                        f"HTTP {resp.status_code}",
-                        request=resp.request,
-                        response=resp,
-                    )
-                resp.raise_for_status()
-                return resp.json()
+                resp = self._http.get(url)
+                data = self._check_response(resp)
+                if cached:
+                    self._cache_put(path, data)
+                return data
             except (httpx.HTTPStatusError, httpx.TimeoutException, httpx.ConnectError) as e:
                 last_exc = e
-                if attempt < self.max_retries - 1:
-                    delay = self.backoff_base * (2**attempt) + random.uniform(0, 0.2)
-                    logger.warning(
-                        "Request failed (attempt %s/%s), retry in %.2fs: %s",
-                        attempt + 1,
-                        self.max_retries,
-                        delay,
-                        e,
-                    )
-                    time.sleep(delay)
-                else:
-                    logger.error("Request failed after %s retries: %s", self.max_retries, e)
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+        if last_exc:
+            raise last_exc
+        raise RuntimeError("Request failed with no exception")
+
+    async def _arequest(self, client: httpx.AsyncClient, path: str) -> Any:
+        """Async _request over a shared AsyncClient; same throttle, status handling and retries."""
+        hit, data = self._cache_get(path)
+        if hit:
+            return data
+        url = f"{self.base_url}{path}"
+        last_exc: Exception | None = None
+        for attempt in range(self.max_retries):
+            await self._athrottle()
+            try:
+                resp = await client.get(url)
+                data = self._check_response(resp)
+                self._cache_put(path, data)
+                return data
+            except (httpx.HTTPStatusError, httpx.TimeoutException, httpx.ConnectError) as e:
+                last_exc = e
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
         if last_exc:
             raise last_exc
         raise RuntimeError("Request failed with no exception")
@@ -92,49 +255,89 @@ class DexScreenerClient:
             except Exception as e:
                 logger.warning("get_pairs_by_pair_addresses failed for %s: %s", pair_id[:16], e)
                 continue
-            pairs = data.get("pairs")
-            pair_one = data.get("pair")
-            if isinstance(pairs, list):
-                all_pairs.extend(pairs)
-            elif isinstance(pair_one, dict) and pair_one.get("pairAddress"):
-                all_pairs.append(pair_one)
-            elif isinstance(data, dict) and data.get("pairAddress"):
-                all_pairs.append(data)
+            all_pairs.extend(_pairs_from_pair_response(data))
         return all_pairs
 
+    async def aget_pairs_by_pair_addresses(self, pair_addresses: list[str]) -> list[dict]:
+        """
+        Async get_pairs_by_pair_addresses: per-pair GETs run concurrently
+        (at most int(rate_limit_rps) in flight, request starts still throttled). Result order follows input order.
+        """
+        if not pair_addresses:
+            return []
+        chain = self.chain_id
+        sem = asyncio.Semaphore(max(1, int(self.rate_limit_rps)))
+
+        async def fetch_pair(client: httpx.AsyncClient, pair_id: str) -> list[dict]:
+            async with sem:
+                try:
+                    data = await self._arequest(client, f"/latest/dex/pairs/{chain}/{pair_id}")
+                except Exception as e:
+                    logger.warning("get_pairs_by_pair_addresses failed for %s: %s", pair_id[:16], e)
+                    return []
+            return _pairs_from_pair_response(data)
+
+        async with self._async_http() as client:
+            results = await asyncio.gather(*(fetch_pair(client, pid) for pid in pair_addresses))
+        return [pair for pairs in results for pair in pairs]
+
     def get_pairs_by_token_addresses_batched(self, token_addresses: list[str]) -> list[dict]:
         """
         Fetch pairs by token addresses. Chunks by TOKENS_CHUNK_SIZE (max 30).
         GET /tokens/v1/{chainId}/{tokenAddresses}.
         """
-        if not token_addresses:
-            return []
-        chain = self.chain_id
         all_pairs: list[dict] = []
-        for i in range(0, len(token_addresses), config.TOKENS_CHUNK_SIZE):
-            chunk = token_addresses[i : i + config.TOKENS_CHUNK_SIZE]
-            addrs_param = ",".join(chunk)
-            path = f"/tokens/v1/{chain}/{addrs_param}"
+        for path in self._token_chunk_paths(token_addresses):
             try:
                 data = self._request(path)
             except Exception as e:
                 logger.warning("get_pairs_by_token_addresses_batched chunk failed: %s", e)
                 continue
-            if isinstance(data, list):
-                all_pairs.extend(data)
-            elif isinstance(data, dict) and data.get("pairs"):
-                all_pairs.extend(data["pairs"])
-            elif isinstance(data, dict) and "pairAddress" in data:
-                all_pairs.append(data)
+            all_pairs.extend(_token_pairs_from_response(data))
         return all_pairs
 
+    def _token_chunk_paths(self, token_addresses: list[str]) -> list[str]:
+        """Request paths for token addresses, TOKENS_CHUNK_SIZE comma-joined addresses per path."""
+        prefix = f"/tokens/v1/{self.chain_id}/"
+        return [prefix + ",".join(chunk) for chunk in _token_chunks(token_addresses)]
+
+    async def aget_pairs_by_token_addresses_batched(
+        self, token_addresses: list[str], failed: list[str] | None = None
+    ) -> list[dict]:
+        """
+        Async get_pairs_by_token_addresses_batched: chunks are fetched concurrently
+        (at most int(rate_limit_rps) in flight, request starts still throttled). Result order follows chunk order.
+        Addresses of chunks that failed after retries are appended to failed, when given.
+        """
+        chunks = _token_chunks(token_addresses)
+        if not chunks:
+            return []
+        prefix = f"/tokens/v1/{self.chain_id}/"
+        sem = asyncio.Semaphore(max(1, int(self.rate_limit_rps)))
+
+        async def fetch_chunk(client: httpx.AsyncClient, chunk: list[str]) -> list[dict]:
+            async with sem:
+                try:
+                    data = await self._arequest(client, prefix + ",".join(chunk))
+                except Exception as e:
+                    logger.warning("get_pairs_by_token_addresses_batched chunk failed: %s", e)
+                    if failed is not None:
+                        failed.extend(chunk)
+                    return []
+            return _token_pairs_from_response(data)
+
+        async with self._async_http() as client:
+            results = await asyncio.gather(*(fetch_chunk(client, chunk) for chunk in chunks))
+        return [pair for chunk_pairs in results for pair in chunk_pairs]
+
     def get_latest_token_profiles(self) -> list[str]:
         """
         Fetch latest token profiles. Returns Solana token addresses only.
         GET /token-profiles/latest/v1. Rate limit: 60 req/min for this endpoint.
         """
         path = "/token-profiles/latest/v1"
-        data = self._request(path)
+        # Not cached: a collect-new cycle shorter than the cache TTL would replay the previous profile list
+        data = self._request(path, cached=False)
         items: list[dict] = []
         if isinstance(data, list):
             items = [x for x in data if isinstance(x, dict)]
@@ -154,3 +357,53 @@ class DexScreenerClient:
             if addr:
                 addresses.append(addr)
         return addresses
+
+
+def _token_chunks(token_addresses: list[str]) -> list[list[str]]:
+    """Token addresses split into TOKENS_CHUNK_SIZE-sized chunks (one /tokens/v1 request each)."""
+    size = config.TOKENS_CHUNK_SIZE
+    return [token_addresses[i : i + size] for i in range(0, len(token_addresses), size)]
+
+
+def _token_pairs_from_response(data: Any) -> list[dict]:
+    """Extract the pair list from a /tokens/v1 response (list, {"pairs": [...]} or single pair)."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and data.get("pairs"):
+        return data["pairs"]
+    if isinstance(data, dict) and "pairAddress" in data:
+        return [data]
+    return []
+
+
+def _pairs_from_pair_response(data: Any) -> list[dict]:
+    """Extract pairs from a /latest/dex/pairs response ({"pairs": [...]}, {"pair": {...}} or a bare pair)."""
+    if not isinstance(data, dict):
+        return []
+    pairs = data.get("pairs")
+    pair_one = data.get("pair")
+    if isinstance(pairs, list):
+        return pairs
+    if isinstance(pair_one, dict) and pair_one.get("pairAddress"):
+        return [pair_one]
+    if data.get("pairAddress"):
+        return [data]
+    return []
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Retry-After header (delta-seconds or HTTP date) as seconds, capped at RETRY_AFTER_MAX_SEC; None if absent/invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), config.RETRY_AFTER_MAX_SEC)
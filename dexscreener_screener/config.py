@@ -1,5 +1,7 @@
 """All constants and configuration for DexScreener Screener."""
 
+import os
+
 # --- DexScreener API ---
 BASE_URL = "https://api.dexscreener.com"
 CHAIN_SOLANA = "solana"
@@ -11,6 +13,16 @@ DEFAULT_TIMEOUT_SEC = 10.0
 DEFAULT_MAX_RETRIES = 4
 DEFAULT_BACKOFF_BASE = 0.5
 DEFAULT_RATE_LIMIT_RPS = 3.0
+# Upper bound for a server-sent Retry-After delay
+RETRY_AFTER_MAX_SEC = 60.0
+# Connection pool of the shared (keep-alive) HTTP client
+HTTP_MAX_CONNECTIONS = 16
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 4
+# Idle keep-alive connections survive this long: longer than the collect-new interval (60s)
+HTTP_KEEPALIVE_EXPIRY_SEC = 90.0
+# Successful GET responses are reused for this long (0 disables), bounded to the most recent N URLs
+HTTP_RESPONSE_CACHE_TTL_SEC = 30.0
+HTTP_RESPONSE_CACHE_MAX = 256
 
 # --- Check command (smoke / self-check) ---
 CHECK_TIMEOUT_SEC = 15.0
@@ -20,6 +32,26 @@ CHECK_PAIR_ADDRESS = "3nMFwZXwY1s1M5s8vYAHqd4wGs4iSxXE4LRoUMMYqEgF"
 
 # --- Database ---
 DEFAULT_DB = "dexscreener.sqlite"
+# Connection PRAGMAs (WAL is skipped for :memory:)
+# Page size for newly created DB files (must be set before WAL; existing files keep theirs)
+DB_PAGE_SIZE = 8192
+# New DB files free pruned pages incrementally: auto_prune reclaims up to N pages per run
+DB_AUTO_VACUUM = "INCREMENTAL"
+DB_INCREMENTAL_VACUUM_PAGES = 1000
+DB_JOURNAL_MODE = "WAL"
+# OFF is safe for read-only runs (export, self-check): DEXSCREENER_DB_SYNCHRONOUS=OFF
+DB_SYNCHRONOUS = os.environ.get("DEXSCREENER_DB_SYNCHRONOUS", "NORMAL").strip().upper()
+DB_MMAP_SIZE = 268435456  # 256 MiB
+DB_CACHE_SIZE_KIB = 65536  # 64 MiB page cache
+DB_WAL_AUTOCHECKPOINT = 1000
+# Loop mode: once the -wal file grows past this (autocheckpoint never shrinks it), checkpoint with TRUNCATE
+DB_WAL_TRUNCATE_BYTES = 64 * 1024 * 1024
+# Loop-mode DB lock heartbeat: holders that call refresh_db_lock every DB_LOCK_HEARTBEAT_SEC
+# are treated as stale once the lock file is DB_LOCK_STALE_SEC old (guards against pid reuse)
+DB_LOCK_HEARTBEAT_SEC = 30
+DB_LOCK_STALE_SEC = 90
+# Set by run.ps1 loop mode: CLI commands refresh <db>.lock from a thread while they run
+DB_LOCK_HEARTBEAT = os.environ.get("DEXSCREENER_DB_LOCK_HEARTBEAT", "").strip() == "1"
 
 # --- Logging ---
 LOG_DIR = "logs"
@@ -39,6 +71,11 @@ SELLS_MIN = 5
 # --- Collect-new ---
 COLLECT_NEW_INTERVAL_SEC = 60.0
 COLLECT_NEW_RATE_LIMIT_NOTE = "token-profiles 60/min"
+# Token candidates already queried within this window are not re-fetched
+COLLECT_NEW_TOKEN_RECHECK_SEC = 600.0
+COLLECT_NEW_RECENT_TOKENS_MAX = 10000
+# Fetched cycles waiting for the DB writer thread (fetch blocks when full)
+COLLECT_NEW_WRITE_QUEUE_MAX = 4
 
 # --- Storage: column name candidates for prune auto-detect ---
 TS_CANDIDATES = [
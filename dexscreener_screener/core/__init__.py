@@ -1,5 +1,21 @@
 """Core utilities: DB lock, etc."""
 
-from dexscreener_screener.core.lock import try_acquire_db_lock, release_db_lock
+from dexscreener_screener.core.lock import (
+    lock_heartbeat,
+    refresh_db_lock,
+    release_db_lock,
+    release_db_lock_async,
+    try_acquire_db_lock,
+    try_acquire_db_lock_async,
+    try_acquire_many,
+)
 
-__all__ = ["try_acquire_db_lock", "release_db_lock"]
+__all__ = [
+    "try_acquire_db_lock",
+    "release_db_lock",
+    "refresh_db_lock",
+    "lock_heartbeat",
+    "try_acquire_many",
+    "try_acquire_db_lock_async",
+    "release_db_lock_async",
+]
@@ -2,60 +2,322 @@
 File lock for single-DB loop mode: prevent two processes from running on the same SQLite DB.
 Lock file: <db_path>.lock with content "pid\\ttimestamp\\n".
 Only for loop mode; smoke/debug do not use this.
+
+The pid in the file is the owner. Check-and-write runs under an OS lock on the file
+(flock / msvcrt.locking), so two processes cannot both take a free lock. When the owner
+is the current process the OS lock is kept until release: others are refused without
+reading the file, and the kernel drops it if the process dies. A lock taken for another
+pid (e.g. run.ps1 passing PowerShell's $PID) outlives this process and relies on the pid check.
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
+import re
+import threading
 import time
-from pathlib import Path
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator
+
+from dexscreener_screener import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    _ERROR_ACCESS_DENIED = 5
+    _STILL_ACTIVE = 259
+
+# Lock file content "pid\ttimestamp\n": pid, optional timestamp (seconds) written at acquire
+_OWNER_RE = re.compile(rb"\s*(\d+)(?:\t(\d+))?(?=\s|$)")
+
+# Linux: process liveness is one stat of /proc/<pid>, no signal syscall
+_HAVE_PROC = os.path.isdir("/proc/self")
+
+# Positional read/write (one syscall, no seek); not available on Windows
+_pread = getattr(os, "pread", None)
+_pwrite = getattr(os, "pwrite", None)
+
+# lock path -> fd whose OS lock this process holds (lock owned by os.getpid())
+_held_fds: dict[str, int] = {}
+# lock path -> time.monotonic_ns() of this process's last refresh_db_lock (immune to wall-clock jumps)
+_last_refresh_ns: dict[str, int] = {}
+# Cached os.getpid(); refreshed in forked children
+_my_pid = os.getpid()
+
+
+def _after_fork_in_child() -> None:
+    """A forked child is a new owner: new pid, and it must not keep the parent's OS locks alive."""
+    global _my_pid
+    _my_pid = os.getpid()
+    for fd in _held_fds.values():
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+    _held_fds.clear()
+    _last_refresh_ns.clear()
 
 
-def _lock_path(db_path: str) -> Path:
-    return Path(db_path).with_suffix(Path(db_path).suffix + ".lock")
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+@lru_cache(maxsize=128)
+def _lock_path(db_path: str) -> str:
+    return db_path + ".lock"
+
+
+def _os_lock(fd: int) -> bool:
+    """Non-blocking exclusive OS lock on fd; False if another process holds it."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _os_unlock(fd: int) -> None:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+def _open_locked(path: str, create: bool) -> int | None:
+    """
+    Open the lock file and take the OS lock on it; None if it is missing (create=False),
+    cannot be opened, or another process holds the OS lock.
+    """
+    flags = os.O_RDWR | (os.O_CREAT if create else 0)
+    for _ in range(3):
+        try:
+            fd = os.open(path, flags, 0o644)
+        except OSError:
+            return None
+        if not _os_lock(fd):
+            os.close(fd)
+            return None
+        if fcntl is None:
+            return fd
+        # The previous owner may have unlinked the file between our open and lock: retry on the new one
+        try:
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                return fd
+        except OSError:
+            if not create:
+                _os_unlock(fd)
+                os.close(fd)
+                return None
+        _os_unlock(fd)
+        os.close(fd)
+    return None
+
+
+def _create_locked(path: str) -> int | None:
+    """
+    Fast path for a free lock: create the file exclusively and take the OS lock on it.
+    None when the file already exists or another process got to it first (caller takes the slow path).
+    """
+    flags = os.O_RDWR | os.O_CREAT | os.O_EXCL
+    try:
+        fd = os.open(path, flags, 0o644)
+    except FileNotFoundError:
+        # Parent directory missing: create it only now, off the common path
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, flags, 0o644)
+        except OSError:
+            return None
+    except OSError:
+        return None
+    if _os_lock(fd):
+        try:
+            if os.fstat(fd).st_size == 0:
+                return fd
+        except OSError:
+            pass
+        # A racing acquirer locked and wrote it between our create and lock
+        _os_unlock(fd)
+    os.close(fd)
+    return None
+
+
+def _read_owner(fd: int) -> tuple[int | None, int | None]:
+    """(pid, timestamp) from the lock file content; None for a field that is missing/unparsable."""
+    if _pread is not None:
+        buf = _pread(fd, 64, 0)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        buf = os.read(fd, 64)
+    m = _OWNER_RE.match(buf)
+    if not m:
+        return None, None
+    return int(m.group(1)), (int(m.group(2)) if m.group(2) else None)
 
 
 def _pid_alive(pid: int) -> bool:
-    """True if process pid exists (Unix: kill 0; Windows: OpenProcess)."""
+    """True if process pid exists (Linux: /proc/<pid>; other Unix: kill 0; Windows: OpenProcess)."""
+    if _HAVE_PROC:
+        return os.path.exists(f"/proc/{pid}")
+    if fcntl is None:
+        return _win_pid_alive(pid)
     try:
         os.kill(pid, 0)
         return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # EPERM: exists, owned by another user
     except OSError:
         return False
-    except Exception:
+
+
+def _win_pid_alive(pid: int) -> bool:
+    """Windows liveness via OpenProcess/GetExitCodeProcess (os.kill(pid, 0) there would terminate the process)."""
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return kernel32.GetLastError() == _ERROR_ACCESS_DENIED
+    try:
+        code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _write_owner(fd: int, pid: int, now_s: int) -> None:
+    """
+    Overwrite the owner line in place: write at offset 0, then cut any longer old tail.
+    The file never passes through an empty state; a torn write can only happen while we
+    hold the OS lock, and a process killed mid-acquire never reported the lock as taken.
+    """
+    payload = f"{pid}\t{now_s}\n".encode("utf-8")
+    if _pwrite is not None:
+        _pwrite(fd, payload, 0)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, payload)
+    os.ftruncate(fd, len(payload))
+
+
+def _heartbeat_expired(fd: int, ts: int | None, now_s: int) -> bool:
+    """
+    True if the holder used refresh_db_lock (mtime moved past the written timestamp ts)
+    and then stopped for DB_LOCK_STALE_SEC: its pid is alive but was likely reused.
+    Locks that are never refreshed are judged by the pid alone.
+    """
+    if ts is None:
+        return False
+    try:
+        mtime = os.fstat(fd).st_mtime
+    except OSError:
         return False
+    return mtime >= ts + 1 and now_s - mtime > config.DB_LOCK_STALE_SEC
+
+
+def refresh_db_lock(db_path: str) -> None:
+    """
+    Heartbeat for a held lock: bump <db>.lock mtime. Call every DB_LOCK_HEARTBEAT_SEC;
+    calls within half that interval of the previous refresh in this process are skipped.
+    """
+    lp = _lock_path(db_path)
+    now_ns = time.monotonic_ns()
+    last_ns = _last_refresh_ns.get(lp)
+    if last_ns is not None and now_ns - last_ns < config.DB_LOCK_HEARTBEAT_SEC * 500_000_000:
+        return
+    try:
+        os.utime(lp, None)
+    except OSError:
+        return
+    _last_refresh_ns[lp] = now_ns
+
+
+@contextmanager
+def lock_heartbeat(db_path: str) -> Iterator[None]:
+    """
+    Refresh <db>.lock every DB_LOCK_HEARTBEAT_SEC from a daemon thread while the block runs.
+    For work done on behalf of the lock holder (run.ps1 cycle commands); a missing lock file is ignored.
+    """
+    stop = threading.Event()
+
+    def beat() -> None:
+        refresh_db_lock(db_path)
+        while not stop.wait(config.DB_LOCK_HEARTBEAT_SEC):
+            refresh_db_lock(db_path)
+
+    thread = threading.Thread(target=beat, name="db-lock-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
 
 
 def try_acquire_db_lock(db_path: str, pid: int | None = None) -> bool:
     """
     Try to acquire lock for this DB. Create <db>.lock with pid and timestamp.
     If pid is None, use current process (os.getpid()); else use given pid (e.g. PowerShell $PID).
+    If this process already holds the lock -> True for its own pid, False for any other.
     If lock exists and PID is alive -> return False (refuse start).
-    If lock exists and PID is dead -> overwrite (stale lock).
+    If lock exists and PID is dead, or its heartbeat stopped (see refresh_db_lock) -> overwrite (stale lock).
     Returns True if lock acquired, False if another process holds it.
     """
-    lp = _lock_path(db_path)
-    my_pid = pid if pid is not None else os.getpid()
-    ts = int(time.time())
+    return _try_acquire(db_path, pid, time.time_ns() // 1_000_000_000)
 
-    if lp.exists():
-        try:
-            raw = lp.read_text(encoding="utf-8").strip()
-            parts = raw.split("\t")
-            if len(parts) >= 1 and parts[0].isdigit():
-                old_pid = int(parts[0])
-                if _pid_alive(old_pid):
-                    return False
-        except (ValueError, OSError):
-            pass
-        # Stale or unreadable: overwrite
 
+def _try_acquire(db_path: str, pid: int | None, now_s: int) -> bool:
+    """try_acquire_db_lock with the wall-clock second (lock timestamp, heartbeat age) supplied by the caller."""
+    lp = _lock_path(db_path)
+    my_pid = pid if pid is not None else _my_pid
+    if lp in _held_fds:
+        # Held by this process: re-acquire for ourselves succeeds without touching the file
+        return my_pid == _my_pid
+
+    fd = _create_locked(lp)
+    fresh = fd is not None
+    if not fresh:
+        fd = _open_locked(lp, create=True)
+        if fd is None:
+            return False
+    keep = False
     try:
-        lp.parent.mkdir(parents=True, exist_ok=True)
-        lp.write_text(f"{my_pid}\t{ts}\n", encoding="utf-8")
+        if not fresh:
+            try:
+                old_pid, old_ts = _read_owner(fd)
+            except OSError:
+                old_pid = old_ts = None  # unreadable: overwrite
+            if old_pid is not None and _pid_alive(old_pid) and not _heartbeat_expired(fd, old_ts, now_s):
+                return False
+        _write_owner(fd, my_pid, now_s)
+        if my_pid == _my_pid:
+            _held_fds[lp] = fd
+            keep = True
         return True
     except OSError:
         return False
+    finally:
+        if not keep:
+            _os_unlock(fd)
+            os.close(fd)
 
 
 def release_db_lock(db_path: str, pid: int | None = None) -> None:
@@ -63,13 +325,63 @@ def release_db_lock(db_path: str, pid: int | None = None) -> None:
     Release lock: remove <db>.lock only if it contains the given pid (or current process if pid is None).
     """
     lp = _lock_path(db_path)
-    if not lp.exists():
+    my_pid = pid if pid is not None else _my_pid
+    fd = _held_fds.get(lp)
+    if fd is None:
+        fd = _open_locked(lp, create=False)
+        if fd is None:
+            return
+    elif my_pid != _my_pid:
+        # A held fd always records this process as owner
         return
-    my_pid = pid if pid is not None else os.getpid()
+    else:
+        del _held_fds[lp]
+    _last_refresh_ns.pop(lp, None)
     try:
-        raw = lp.read_text(encoding="utf-8").strip()
-        parts = raw.split("\t")
-        if len(parts) >= 1 and parts[0].isdigit() and int(parts[0]) == my_pid:
-            lp.unlink()
-    except (ValueError, OSError):
-        pass
+        owned = _read_owner(fd)[0] == my_pid
+    except OSError:
+        owned = False
+    if owned and fcntl is not None:
+        # Unlink while still holding the OS lock so no one can take the old file in between
+        try:
+            os.unlink(lp)
+        except OSError:
+            pass
+    _os_unlock(fd)
+    os.close(fd)
+    if owned and fcntl is None:
+        # Windows cannot delete a file that is still open
+        try:
+            os.unlink(lp)
+        except OSError:
+            pass
+
+
+def try_acquire_many(db_paths: list[str], pid: int | None = None) -> bool:
+    """
+    All-or-nothing try_acquire_db_lock for several DBs. Locks are taken in sorted path order;
+    if any is held elsewhere, the ones taken by this call are released and False is returned.
+    """
+    now_s = time.time_ns() // 1_000_000_000  # one timestamp for every lock in the batch
+    taken: list[str] = []
+    for db_path in sorted(set(db_paths)):
+        if _lock_path(db_path) in _held_fds and (pid is None or pid == _my_pid):
+            continue  # already ours before this call: leave it held on failure
+        if not _try_acquire(db_path, pid, now_s):
+            for done in reversed(taken):
+                release_db_lock(done, pid)
+            return False
+        taken.append(db_path)
+    return True
+
+
+async def try_acquire_db_lock_async(db_path: str, pid: int | None = None) -> bool:
+    """try_acquire_db_lock for coroutines: file I/O runs in a worker thread, a lock already held returns at once."""
+    if pid is None and _lock_path(db_path) in _held_fds:
+        return True
+    return await asyncio.to_thread(try_acquire_db_lock, db_path, pid)
+
+
+async def release_db_lock_async(db_path: str, pid: int | None = None) -> None:
+    """release_db_lock for coroutines (file I/O in a worker thread)."""
+    await asyncio.to_thread(release_db_lock, db_path, pid)
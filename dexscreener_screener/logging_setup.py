@@ -1,6 +1,9 @@
 """Unified logging setup for DexScreener Screener."""
 
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from dexscreener_screener import config
@@ -13,6 +16,8 @@ def setup_logging(
     """
     Configure root logging: one file (logs/app.log), format timestamp level module: message.
     Preserves current log style for analysis compatibility.
+    Callers only enqueue records; a listener thread formats them and writes file and console,
+    so log I/O stays off the collect path. The queue is drained at exit.
     """
     root = logging.getLogger()
     root.setLevel(level)
@@ -23,11 +28,14 @@ def setup_logging(
         fh = logging.FileHandler(log_path, encoding="utf-8")
         fh.setLevel(level)
         fh.setFormatter(logging.Formatter(format_string))
-        root.addHandler(fh)
         sh = logging.StreamHandler()
         sh.setLevel(level)
         sh.setFormatter(logging.Formatter(format_string))
-        root.addHandler(sh)
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, fh, sh, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        root.addHandler(QueueHandler(log_queue))
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
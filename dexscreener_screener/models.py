@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import Any
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TokenInfo:
     """Token identity (base or quote)."""
     address: str
@@ -13,8 +13,19 @@ class TokenInfo:
 
 
 def _parse_float(value: Any) -> float | None:
-    if value is None:
+    # Exact-type checks first: API numbers are float/int, strings are parsed without a str() copy
+    t = type(value)
+    if t is float:
+        return value
+    if t is int:
+        return float(value)
+    if value is None or value == "":
         return None
+    if t is str:
+        try:
+            return float(value)
+        except ValueError:
+            return None
     if isinstance(value, (int, float)):
         return float(value)
     try:
@@ -24,8 +35,16 @@ def _parse_float(value: Any) -> float | None:
 
 
 def _parse_int(value: Any) -> int | None:
-    if value is None:
+    t = type(value)
+    if t is int:
+        return value
+    if value is None or value == "":
         return None
+    if t is str or t is float:
+        try:
+            return int(float(value))
+        except ValueError:
+            return None
     if isinstance(value, int):
         return value
     try:
@@ -34,23 +53,16 @@ def _parse_int(value: Any) -> int | None:
         return None
 
 
-def _get_nested(d: dict | None, *keys: str) -> Any:
-    if not d or not isinstance(d, dict):
-        return None
-    for k in keys:
-        d = d.get(k) if isinstance(d, dict) else None
-        if d is None:
-            return None
-    return d
+# Shared read-only stand-in for a missing or malformed nested object; never mutated
+_EMPTY: dict = {}
 
 
-def _period_value(d: dict | None, period: str) -> Any:
-    if not d or not isinstance(d, dict):
-        return None
-    return d.get(period)
+def _as_dict(value: Any) -> dict:
+    """value if it is a dict, else an empty dict, so nested fields are read with plain .get()."""
+    return value if isinstance(value, dict) else _EMPTY
 
 
-@dataclass
+@dataclass(slots=True)
 class PairSnapshot:
     """Unified snapshot of a DEX pair from any DexScreener endpoint."""
     snapshot_ts: int
@@ -87,6 +99,14 @@ class PairSnapshot:
     age_seconds: float | None = None
 
 
+def _txns_counts(txns: dict, period: str) -> tuple[int | None, int | None]:
+    """(buys, sells) for one period of the txns object ({"m5": {"buys": n, "sells": n}, ...}); one lookup per period."""
+    period_txns = txns.get(period)
+    if not period_txns or not isinstance(period_txns, dict):
+        return None, None
+    return _parse_int(period_txns.get("buys")), _parse_int(period_txns.get("sells"))
+
+
 def _token_from_dict(d: dict | None) -> TokenInfo:
     if not d or not isinstance(d, dict):
         return TokenInfo(address="", symbol="", name="")
@@ -112,34 +132,31 @@ def from_api_pair(pair_dict: dict, snapshot_ts: int) -> PairSnapshot:
     price_usd = _parse_float(pair_dict.get("priceUsd"))
     price_native = _parse_float(pair_dict.get("priceNative"))
 
-    liq = pair_dict.get("liquidity")
-    liquidity_usd = _parse_float(_get_nested(liq, "usd")) if liq else None
-    liquidity_base = _parse_float(_get_nested(liq, "base")) if liq else None
-    liquidity_quote = _parse_float(_get_nested(liq, "quote")) if liq else None
-
-    vol = pair_dict.get("volume")
-    volume_m5 = _parse_float(_period_value(vol, "m5"))
-    volume_h1 = _parse_float(_period_value(vol, "h1"))
-    volume_h6 = _parse_float(_period_value(vol, "h6"))
-    volume_h24 = _parse_float(_period_value(vol, "h24"))
-
-    pc = pair_dict.get("priceChange")
-    price_change_m5 = _parse_float(_period_value(pc, "m5"))
-    price_change_h1 = _parse_float(_period_value(pc, "h1"))
-    price_change_h6 = _parse_float(_period_value(pc, "h6"))
-    price_change_h24 = _parse_float(_period_value(pc, "h24"))
-
-    txns = pair_dict.get("txns")
-    def tx_buys(period: str) -> int | None:
-        p = _period_value(txns, period)
-        return _parse_int(p.get("buys")) if p and isinstance(p, dict) else None
-    def tx_sells(period: str) -> int | None:
-        p = _period_value(txns, period)
-        return _parse_int(p.get("sells")) if p and isinstance(p, dict) else None
+    # Each nested object is fetched once; fields are then plain .get() calls
+    liq = _as_dict(pair_dict.get("liquidity"))
+    liquidity_usd = _parse_float(liq.get("usd"))
+    liquidity_base = _parse_float(liq.get("base"))
+    liquidity_quote = _parse_float(liq.get("quote"))
+
+    vol = _as_dict(pair_dict.get("volume"))
+    volume_m5 = _parse_float(vol.get("m5"))
+    volume_h1 = _parse_float(vol.get("h1"))
+    volume_h6 = _parse_float(vol.get("h6"))
+    volume_h24 = _parse_float(vol.get("h24"))
+
+    pc = _as_dict(pair_dict.get("priceChange"))
+    price_change_m5 = _parse_float(pc.get("m5"))
+    price_change_h1 = _parse_float(pc.get("h1"))
+    price_change_h6 = _parse_float(pc.get("h6"))
+    price_change_h24 = _parse_float(pc.get("h24"))
+
+    txns = _as_dict(pair_dict.get("txns"))
+    txns_m5_buys, txns_m5_sells = _txns_counts(txns, "m5")
+    txns_h1_buys, txns_h1_sells = _txns_counts(txns, "h1")
+    txns_h6_buys, txns_h6_sells = _txns_counts(txns, "h6")
+    txns_h24_buys, txns_h24_sells = _txns_counts(txns, "h24")
 
     pair_created_at_ms = _parse_int(pair_dict.get("pairCreatedAt"))
-    if isinstance(pair_dict.get("pairCreatedAt"), int):
-        pair_created_at_ms = pair_dict["pairCreatedAt"]
     age_seconds = None
     if pair_created_at_ms is not None and snapshot_ts is not None:
         age_seconds = (snapshot_ts - pair_created_at_ms) / 1000.0
@@ -165,14 +182,14 @@ def from_api_pair(pair_dict: dict, snapshot_ts: int) -> PairSnapshot:
         price_change_h1=price_change_h1,
         price_change_h6=price_change_h6,
         price_change_h24=price_change_h24,
-        txns_m5_buys=tx_buys("m5"),
-        txns_m5_sells=tx_sells("m5"),
-        txns_h1_buys=tx_buys("h1"),
-        txns_h1_sells=tx_sells("h1"),
-        txns_h6_buys=tx_buys("h6"),
-        txns_h6_sells=tx_sells("h6"),
-        txns_h24_buys=tx_buys("h24"),
-        txns_h24_sells=tx_sells("h24"),
+        txns_m5_buys=txns_m5_buys,
+        txns_m5_sells=txns_m5_sells,
+        txns_h1_buys=txns_h1_buys,
+        txns_h1_sells=txns_h1_sells,
+        txns_h6_buys=txns_h6_buys,
+        txns_h6_sells=txns_h6_sells,
+        txns_h24_buys=txns_h24_buys,
+        txns_h24_sells=txns_h24_sells,
         fdv=_parse_float(pair_dict.get("fdv")),
         market_cap=_parse_float(pair_dict.get("marketCap")),
         pair_created_at_ms=pair_created_at_ms,
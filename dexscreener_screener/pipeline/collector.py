@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import codecs
 import csv
+import io
 import time
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable
 
+from dexscreener_screener import config
 from dexscreener_screener.client import DexScreenerClient
 from dexscreener_screener.logging_setup import get_logger
-from dexscreener_screener.models import from_api_pair
+from dexscreener_screener.models import PairSnapshot, from_api_pair
 from dexscreener_screener.storage import Database
 
 logger = get_logger(__name__)
@@ -24,30 +30,92 @@ def parse_addresses_input(value: str) -> list[str]:
         return []
     p = Path(value)
     if p.is_file():
-        addresses = []
-        for encoding in ("utf-8", "utf-8-sig", "cp1252", "latin-1"):
-            try:
-                with open(p, newline="", encoding=encoding) as f:
-                    reader = csv.reader(f)
-                    for row in reader:
-                        if row and row[0].strip():
-                            addresses.append(row[0].strip())
-                return addresses
-            except (UnicodeDecodeError, UnicodeError):
-                continue
-            except Exception as e:
-                logger.warning("Failed to read file %s: %s", value, e)
-                break
-        return addresses
+        st = p.stat()
+        return list(_read_addresses_file(str(p.resolve()), st.st_mtime_ns, st.st_size))
     return [a.strip() for a in value.split(",") if a.strip()]
 
 
+@lru_cache(maxsize=8)
+def _read_addresses_file(path: str, mtime_ns: int, size: int) -> tuple[str, ...]:
+    """
+    Read first-column addresses from file. Cached per (path, mtime_ns, size): re-read only when the file changes.
+    Bytes are read once and the encoding is picked from the BOM; lines are split directly,
+    csv.reader is used only when the file contains quotes.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        logger.warning("Failed to read file %s: %s", path, e)
+        return ()
+    if data.startswith(codecs.BOM_UTF8):
+        encodings: tuple[str, ...] = ("utf-8-sig",)
+    elif data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encodings = ("utf-16",)
+    else:
+        encodings = ("utf-8", "cp1252", "latin-1")
+    text = ""
+    for encoding in encodings:
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    if '"' in text:
+        # quoted fields may contain commas/newlines: let csv handle them
+        rows = csv.reader(io.StringIO(text, newline=""))
+        return tuple(a for a in (row[0].strip() for row in rows if row) if a)
+    return tuple(a for a in (line.partition(",")[0].strip() for line in text.splitlines()) if a)
+
+
 class Collector:
     """Orchestrates fetch (client) -> normalize (models) -> persist (storage)."""
 
     def __init__(self, client: DexScreenerClient, db: Database) -> None:
         self.client = client
         self.db = db
+        # token address -> monotonic time it was last queried (oldest first)
+        self._recent_tokens: OrderedDict[str, float] = OrderedDict()
+        # pair addresses already in DB; loaded on first use, kept in sync by _persist_pairs
+        self._known: set[str] | None = None
+
+    @property
+    def known_pair_addresses(self) -> set[str]:
+        """Pair addresses already persisted (in-memory, loaded from DB once)."""
+        if self._known is None:
+            self._known = self.db.get_known_pair_addresses()
+        return self._known
+
+    def reload_known_pairs(self) -> None:
+        """Drop the in-memory known-pair set; next use reloads from DB (call after prune)."""
+        self._known = None
+
+    def select_token_candidates(self, token_addresses: list[str], limit: int | None = None) -> list[str]:
+        """
+        Dedup token addresses (order kept), drop those queried within COLLECT_NEW_TOKEN_RECHECK_SEC,
+        apply limit. Call mark_queried with the addresses actually fetched.
+        """
+        recent = self._recent_tokens
+        cutoff = time.monotonic() - config.COLLECT_NEW_TOKEN_RECHECK_SEC
+        while recent:
+            oldest_addr, oldest_ts = next(iter(recent.items()))
+            if oldest_ts >= cutoff:
+                break
+            del recent[oldest_addr]
+        selected = [a for a in dict.fromkeys(token_addresses) if a not in recent]
+        if limit is not None and limit > 0:
+            selected = selected[:limit]
+        return selected
+
+    def mark_queried(self, token_addresses: Iterable[str]) -> None:
+        """Mark token addresses as queried now (skipped by select_token_candidates for COLLECT_NEW_TOKEN_RECHECK_SEC)."""
+        now = time.monotonic()
+        recent = self._recent_tokens
+        for addr in token_addresses:
+            recent[addr] = now
+            recent.move_to_end(addr)
+        while len(recent) > config.COLLECT_NEW_RECENT_TOKENS_MAX:
+            recent.popitem(last=False)
 
     def collect_for_tokens(self, token_addresses: list[str]) -> tuple[int, int]:
         """
@@ -58,7 +126,7 @@ class Collector:
             logger.info("collect_for_tokens: no token addresses provided")
             return 0, 0
         logger.info("collect_for_tokens: starting for %s token address(es)", len(token_addresses))
-        raw_pairs = self.client.get_pairs_by_token_addresses_batched(token_addresses)
+        raw_pairs = self.client.run(self.client.aget_pairs_by_token_addresses_batched(token_addresses))
         return self._persist_pairs(raw_pairs)
 
     def collect_for_pairs(self, pair_addresses: list[str]) -> tuple[int, int]:
@@ -70,16 +138,15 @@ class Collector:
             logger.info("collect_for_pairs: no pair addresses provided")
             return 0, 0
         logger.info("collect_for_pairs: starting for %s pair address(es)", len(pair_addresses))
-        raw_pairs = self.client.get_pairs_by_pair_addresses(pair_addresses)
+        raw_pairs = self.client.run(self.client.aget_pairs_by_pair_addresses(pair_addresses))
         return self._persist_pairs(raw_pairs)
 
-    def collect_from_raw_pairs(
-        self, raw_pairs: list[dict], known_pair_addresses: set[str]
-    ) -> tuple[int, int, int]:
+    def collect_from_raw_pairs(self, raw_pairs: list[dict]) -> tuple[int, int, int]:
         """
-        Filter raw pairs to those not in known_pair_addresses, persist.
+        Filter raw pairs to those not already known (known_pair_addresses), persist.
         Returns (processed, errors, skipped).
         """
+        known_pair_addresses = self.known_pair_addresses
         filtered = []
         for raw in raw_pairs:
             if not isinstance(raw, dict):
@@ -92,25 +159,72 @@ class Collector:
         return processed, errors, skipped
 
     def _persist_pairs(self, raw_pairs: list[dict]) -> tuple[int, int]:
-        """Normalize raw API pairs to PairSnapshot and write to DB. Returns (processed, errors)."""
-        snapshot_ts = int(time.time() * 1000)
+        """
+        Normalize raw API pairs to PairSnapshot and write them in one transaction:
+        tokens, pairs and snapshots as batches, then the dump watchlist per pair. Returns (processed, errors).
+        """
+        snapshot_ts = time.time_ns() // 1_000_000
         processed = 0
         errors = 0
+        snapshots: list[PairSnapshot] = []
+        # Local binds: the loops below run once per fetched pair
+        normalize = from_api_pair
+        append = snapshots.append
         for raw in raw_pairs:
             try:
-                snapshot = from_api_pair(raw, snapshot_ts)
-                if not snapshot.pair_address:
-                    logger.warning("Skipping pair with empty pair_address")
-                    errors += 1
-                    continue
-                self.db.upsert_token(snapshot.base_token)
-                self.db.upsert_token(snapshot.quote_token)
-                self.db.upsert_pair(snapshot)
-                self.db.insert_snapshot(snapshot)
-                self.db.update_dump_watchlist_for_snapshot(snapshot.pair_address)
-                processed += 1
+                snapshot = normalize(raw, snapshot_ts)
             except Exception as e:
                 logger.warning("Failed to persist pair: %s", e)
                 errors += 1
+                continue
+            if not snapshot.pair_address:
+                logger.warning("Skipping pair with empty pair_address")
+                errors += 1
+                continue
+            append(snapshot)
+        db = self.db
+        with db.transaction():
+            try:
+                db.upsert_tokens_bulk(t for snap in snapshots for t in (snap.base_token, snap.quote_token))
+            except Exception as e:
+                logger.warning("Failed to persist tokens: %s", e)
+            snapshots, write_errors = self._write_snapshots(snapshots)
+            errors += write_errors
+            update_watchlist = db.update_dump_watchlist_for_snapshot
+            now_ms = time.time_ns() // 1_000_000
+            for snapshot in snapshots:
+                try:
+                    update_watchlist(snapshot.pair_address, now_ms)
+                    processed += 1
+                except Exception as e:
+                    logger.warning("Failed to persist pair: %s", e)
+                    errors += 1
+        if self._known is not None:
+            self._known.update(snap.pair_address for snap in snapshots)
         logger.info("Persisted %s pair(s), %s error(s)", processed, errors)
         return processed, errors
+
+    def _write_snapshots(self, snapshots: list[PairSnapshot]) -> tuple[list[PairSnapshot], int]:
+        """
+        Batch-upsert pairs and insert snapshots; if the batch fails it is rolled back
+        and retried pair by pair. Returns (written, errors).
+        """
+        try:
+            with self.db.transaction():
+                self.db.upsert_pairs_bulk(snapshots)
+                self.db.insert_snapshots_bulk(snapshots)
+            return snapshots, 0
+        except Exception as e:
+            logger.warning("Batch pair/snapshot write failed, retrying row by row: %s", e)
+        written: list[PairSnapshot] = []
+        errors = 0
+        for snapshot in snapshots:
+            try:
+                with self.db.transaction():
+                    self.db.upsert_pair(snapshot)
+                    self.db.insert_snapshot(snapshot)
+                written.append(snapshot)
+            except Exception as e:
+                logger.warning("Failed to persist pair: %s", e)
+                errors += 1
+        return written, errors
@@ -4,8 +4,13 @@ from __future__ import annotations
 
 import sqlite3
 import time
+from sys import intern
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from itertools import chain
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import Any, Generator, Sequence
+from typing import Any, Generator, Iterable, Iterator, Sequence
 
 from dexscreener_screener import config
 from dexscreener_screener.models import PairSnapshot, TokenInfo
@@ -101,16 +106,23 @@ CREATE TABLE IF NOT EXISTS snapshots (
 );
 """
 
-IDX_SNAPSHOTS_PAIR_TS = """
-CREATE INDEX IF NOT EXISTS idx_snapshots_pair_ts ON snapshots (pair_address, snapshot_ts);
-"""
-
-IDX_SNAPSHOTS_PAIR = """
-CREATE INDEX IF NOT EXISTS idx_snapshots_pair_address ON snapshots (pair_address);
+# Per-pair snapshot reads (last rows, peak) are served from this index alone, newest first.
+# It also serves every lookup by pair_address or (pair_address, snapshot_ts), so the older
+# single-purpose indexes are dropped.
+IDX_SNAPSHOTS_PAIR_TS_COVER = """
+CREATE INDEX IF NOT EXISTS idx_snapshots_pair_ts_cover
+    ON snapshots (pair_address, snapshot_ts DESC, price_usd, volume_m5, txns_m5_buys, txns_m5_sells);
+DROP INDEX IF EXISTS idx_snapshots_pair_ts;
+DROP INDEX IF EXISTS idx_snapshots_pair_address;
 """
 
+# prune_by_pair_age: old pairs are read from this index alone (age range + pair_address, no rowid lookups),
+# then their snapshots are found by pair_address.
+# The predicate must match the queries (IS NOT NULL AND != 0) for SQLite to pick the partial index.
 IDX_PAIRS_CREATED = """
-CREATE INDEX IF NOT EXISTS idx_pairs_pair_created_at_ms ON pairs (pair_created_at_ms);
+CREATE INDEX IF NOT EXISTS idx_pairs_created_valid ON pairs (pair_created_at_ms, pair_address)
+    WHERE pair_created_at_ms IS NOT NULL AND pair_created_at_ms != 0;
+DROP INDEX IF EXISTS idx_pairs_pair_created_at_ms;
 """
 
 SCHEMA_DUMP_WATCHLIST = """
@@ -133,7 +145,11 @@ CREATE TABLE IF NOT EXISTS dump_watchlist (
     signal_price REAL
 );
 """
-IDX_DUMP_WATCHLIST_STATE = "CREATE INDEX IF NOT EXISTS idx_dump_watchlist_state ON dump_watchlist(state);"
+# Filter by state and list newest update first from the index alone (replaces the state-only index)
+IDX_DUMP_WATCHLIST_STATE = """
+CREATE INDEX IF NOT EXISTS idx_dump_watchlist_state_updated ON dump_watchlist(state, updated_at_ms);
+DROP INDEX IF EXISTS idx_dump_watchlist_state;
+"""
 IDX_DUMP_WATCHLIST_UPDATED = "CREATE INDEX IF NOT EXISTS idx_dump_watchlist_updated ON dump_watchlist(updated_at_ms);"
 
 # --- Strategy layer (second screener): ATH-based drawdown ---
@@ -259,6 +275,37 @@ PAIRS_COLUMNS = [
 
 SNAPSHOTS_COLUMNS = ["pair_address"] + PAIRS_COLUMNS[1:]
 
+_SYNCHRONOUS_MODES = frozenset({"OFF", "NORMAL", "FULL", "EXTRA"})
+_AUTO_VACUUM_MODES = frozenset({"NONE", "FULL", "INCREMENTAL"})
+_CHECKPOINT_MODES = frozenset({"PASSIVE", "FULL", "RESTART", "TRUNCATE"})
+# UPDATE ... RETURNING needs SQLite 3.35.0+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def _max_variable_number() -> int:
+    """
+    Bound-parameter limit of the linked SQLite, read from a connection on Python 3.11+ (builds may
+    compile in less than the 32766 default); 999, the lowest default of any version, on older Pythons.
+    """
+    limit = getattr(sqlite3, "SQLITE_LIMIT_VARIABLE_NUMBER", None)
+    if limit is None:
+        return 999
+    conn = sqlite3.connect(":memory:")
+    try:
+        return conn.getlimit(limit)
+    finally:
+        conn.close()
+
+
+SQLITE_MAX_VARIABLE_NUMBER = _max_variable_number()
+# Max rows per multi-row INSERT statement
+BULK_MAX_ROWS = 500
+
+
+def chunk_rows(ncols: int) -> int:
+    """Rows per multi-row INSERT for a table of ncols columns: BULK_MAX_ROWS, bounded by the variable limit."""
+    return max(1, min(BULK_MAX_ROWS, SQLITE_MAX_VARIABLE_NUMBER // ncols))
+
 
 def normalize_since_ts(created_at_ms: int, snapshot_ts_is_ms: bool) -> int:
     """Convert created_at_ms to same unit as snapshot_ts for comparison. created_at_ms is always ms."""
@@ -283,13 +330,12 @@ def _pick(cols: Sequence[tuple[str, str]], candidates: Sequence[str]) -> str | N
 
 
 def _must_pick(
-    conn: sqlite3.Connection,
+    cols: Sequence[tuple[str, str]],
     table: str,
     candidates: Sequence[str],
     what: str,
 ) -> str:
-    """Return matching column or raise ValueError with helpful message."""
-    cols = _pragma_table_info(conn, table)
+    """Return matching column among cols (from _pragma_table_info) or raise ValueError with helpful message."""
     picked = _pick(cols, candidates)
     if not picked:
         raise ValueError(
@@ -308,110 +354,309 @@ def _detect_ms_or_sec(conn: sqlite3.Connection, table: str, ts_col: str) -> int:
     return 1000 if mx > 10**12 else 1
 
 
-def _snapshot_to_row(s: PairSnapshot) -> tuple:
-    """Convert PairSnapshot to row tuple for insert."""
-    return (
-        s.pair_address,
-        s.chain_id,
-        s.dex_id,
-        s.url,
-        s.base_token.address,
-        s.base_token.symbol,
-        s.base_token.name,
-        s.quote_token.address,
-        s.quote_token.symbol,
-        s.quote_token.name,
-        s.price_usd,
-        s.price_native,
-        s.liquidity_usd,
-        s.liquidity_base,
-        s.liquidity_quote,
-        s.volume_m5,
-        s.volume_h1,
-        s.volume_h6,
-        s.volume_h24,
-        s.price_change_m5,
-        s.price_change_h1,
-        s.price_change_h6,
-        s.price_change_h24,
-        s.txns_m5_buys,
-        s.txns_m5_sells,
-        s.txns_h1_buys,
-        s.txns_h1_sells,
-        s.txns_h6_buys,
-        s.txns_h6_sells,
-        s.txns_h24_buys,
-        s.txns_h24_sells,
-        s.fdv,
-        s.market_cap,
-        s.pair_created_at_ms,
-        s.snapshot_ts,
-    )
+# Rows per fetchmany() when iterate_* turn tuple rows into dicts
+_FETCH_BATCH_ROWS = 1000
+
+
+def _dict_rows(cur: sqlite3.Cursor, cols: list[str]) -> Iterator[dict[str, Any]]:
+    """Yield rows of a plain-tuple cursor (see Database._select_cursor) as dicts, fetching in batches."""
+    fetch = cur.fetchmany
+    while True:
+        rows = fetch(_FETCH_BATCH_ROWS)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(cols, row))
+
+
+# PairSnapshot -> row tuple for insert, in PAIRS_COLUMNS / SNAPSHOTS_COLUMNS order (attribute reads run in C)
+_snapshot_to_row = attrgetter(
+    "pair_address", "chain_id", "dex_id", "url",
+    "base_token.address", "base_token.symbol", "base_token.name",
+    "quote_token.address", "quote_token.symbol", "quote_token.name",
+    "price_usd", "price_native", "liquidity_usd", "liquidity_base", "liquidity_quote",
+    "volume_m5", "volume_h1", "volume_h6", "volume_h24",
+    "price_change_m5", "price_change_h1", "price_change_h6", "price_change_h24",
+    "txns_m5_buys", "txns_m5_sells", "txns_h1_buys", "txns_h1_sells",
+    "txns_h6_buys", "txns_h6_sells", "txns_h24_buys", "txns_h24_sells",
+    "fdv", "market_cap", "pair_created_at_ms", "snapshot_ts",
+)
+
+# Write statements, built once at import
+# Tokens referenced by no pair. The set of referenced addresses is built once (one scan of pairs)
+# and probed per token, instead of an EXISTS with OR that rescans pairs for every token.
+# NULLs are excluded: one NULL in a NOT IN list would make the test NULL for every token.
+_ORPHAN_TOKENS_WHERE = """
+WHERE address NOT IN (
+    SELECT base_address FROM pairs WHERE base_address IS NOT NULL
+    UNION
+    SELECT quote_address FROM pairs WHERE quote_address IS NOT NULL
+)"""
+
+# self_check_invariants in one round-trip; params: (cutoff_ms, cutoff_ms).
+# "!= 0" is redundant next to "> 0" but lets SQLite use the partial index idx_pairs_created_valid.
+_SELF_CHECK_SQL = """
+SELECT
+    (SELECT COUNT(*) FROM pairs
+     WHERE pair_created_at_ms IS NOT NULL AND pair_created_at_ms != 0
+       AND pair_created_at_ms > 0 AND pair_created_at_ms < ?),
+    (SELECT COUNT(*) FROM snapshots
+     WHERE pair_address IN (
+         SELECT pair_address FROM pairs
+         WHERE pair_created_at_ms IS NOT NULL AND pair_created_at_ms != 0
+           AND pair_created_at_ms > 0 AND pair_created_at_ms < ?
+     )),
+    (SELECT COUNT(*) FROM tokens""" + _ORPHAN_TOKENS_WHERE + """)"""
+
+# Inputs of update_dump_watchlist_for_snapshot; params: (pair_address,) * 3.
+# Each branch keeps its own index seek (LIMIT), UNION ALL returns them in order.
+_WATCHLIST_INPUTS_SQL = """
+SELECT 'r' AS kind, price_usd, volume_m5, txns_m5_buys, txns_m5_sells, snapshot_ts FROM (
+    SELECT price_usd, volume_m5, txns_m5_buys, txns_m5_sells, snapshot_ts
+    FROM snapshots WHERE pair_address=? ORDER BY snapshot_ts DESC LIMIT 2
+)
+UNION ALL
+SELECT 'p', price_usd, NULL, NULL, NULL, snapshot_ts FROM (
+    SELECT price_usd, snapshot_ts
+    FROM snapshots
+    WHERE pair_address=? AND price_usd IS NOT NULL AND price_usd > 0
+    ORDER BY price_usd DESC, snapshot_ts DESC
+    LIMIT 1
+)
+UNION ALL
+SELECT 'l', liquidity_usd, NULL, NULL, NULL, NULL FROM pairs WHERE pair_address=?"""
+_UPDATE_DUMP_WATCHLIST_SQL = """
+UPDATE dump_watchlist SET
+    updated_at_ms=?, last_price=?, last_ts=?, drop_pct=?,
+    volume_m5=?, buys_m5=?, sells_m5=?,
+    peak_ts=CASE WHEN peak_price < ? THEN ? ELSE peak_ts END,
+    peak_price=CASE WHEN peak_price < ? THEN ? ELSE peak_price END,
+    low_ts=CASE WHEN ? < low_price THEN ? ELSE low_ts END,
+    low_price=CASE WHEN ? < low_price THEN ? ELSE low_price END
+WHERE pair_address=?"""
+_UPSERT_TOKEN_SQL = (
+    "INSERT INTO tokens (address, chain_id, symbol, name) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(address) DO UPDATE SET "
+    "chain_id = excluded.chain_id, symbol = excluded.symbol, name = excluded.name"
+)
+_UPSERT_PAIR_SQL = (
+    f"INSERT INTO pairs ({','.join(PAIRS_COLUMNS)}) VALUES ({','.join('?' * len(PAIRS_COLUMNS))}) "
+    "ON CONFLICT(pair_address) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in PAIRS_COLUMNS[1:])
+)
+_SNAPSHOT_COLUMN_SET = frozenset(SNAPSHOTS_COLUMNS)
+_SNAPSHOT_ROW_PLACEHOLDERS = "(" + ",".join("?" * len(SNAPSHOTS_COLUMNS)) + ")"
+_INSERT_SNAPSHOT_PREFIX = f"INSERT INTO snapshots ({','.join(SNAPSHOTS_COLUMNS)}) VALUES "
+_INSERT_SNAPSHOT_SQL = _INSERT_SNAPSHOT_PREFIX + _SNAPSHOT_ROW_PLACEHOLDERS
+_SNAPSHOT_ROWS_PER_STMT = chunk_rows(len(SNAPSHOTS_COLUMNS))
+
+
+@lru_cache(maxsize=_SNAPSHOT_ROWS_PER_STMT)
+def _insert_snapshots_sql(n_rows: int) -> str:
+    """Multi-row snapshot INSERT for n_rows rows; built once per size, and the same string keeps sqlite3's statement cache warm."""
+    return _INSERT_SNAPSHOT_PREFIX + ",".join([_SNAPSHOT_ROW_PLACEHOLDERS] * n_rows)
+
+
+_INSERT_SNAPSHOTS_CHUNK_SQL = _insert_snapshots_sql(_SNAPSHOT_ROWS_PER_STMT)
+
+_DUMP_WATCHLIST_DDL = SCHEMA_DUMP_WATCHLIST + IDX_DUMP_WATCHLIST_STATE + IDX_DUMP_WATCHLIST_UPDATED
+_TRIGGER_EVAL_DDL = SCHEMA_SIGNAL_TRIGGER_EVALUATIONS + IDX_SIGNAL_TRIGGER_EVALS_STATUS
+_STRATEGY_DDL = (
+    SCHEMA_STRATEGY_DECISIONS
+    + IDX_STRATEGY_DECISIONS_PAIR
+    + IDX_STRATEGY_DECISIONS_DECIDED
+    + SCHEMA_STRATEGY_LATEST
+    + SCHEMA_SIGNAL_COOLDOWNS
+    + SCHEMA_SIGNAL_EVENTS
+    + IDX_SIGNAL_EVENTS_PAIR
+    + IDX_SIGNAL_EVENTS_TS
+    + SCHEMA_SIGNAL_EVALUATIONS
+    + IDX_SIGNAL_EVALUATIONS_SIGNAL
+    + IDX_SIGNAL_EVALUATIONS_STATUS
+)
+_INIT_SCHEMA_SQL = (
+    "BEGIN;"
+    + SCHEMA_TOKENS + SCHEMA_PAIRS + SCHEMA_SNAPSHOTS
+    + IDX_SNAPSHOTS_PAIR_TS_COVER + IDX_PAIRS_CREATED
+    + _DUMP_WATCHLIST_DDL + _STRATEGY_DDL + _TRIGGER_EVAL_DDL + SCHEMA_APP_STATUS
+    + "\nCOMMIT;"
+)
 
 
 class Database:
     """SQLite wrapper for tokens, pairs, snapshots, dump_watchlist. No API knowledge."""
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, check_same_thread: bool = True) -> None:
+        """check_same_thread=False lets one other thread own the connection (caller serializes access)."""
         self.db_path = Path(db_path)
+        self._check_same_thread = check_same_thread
         self._conn: sqlite3.Connection | None = None
+        self._tx_depth = 0
+        # prune(): resolved column names, snapshot ts unit per column (schema is fixed after init_schema)
+        self._prune_cols: dict[str, str] | None = None
+        self._ts_units: dict[str, int] = {}
         self._connect()
         self.init_schema()
 
     def _connect(self) -> None:
-        self._conn = sqlite3.connect(str(self.db_path))
+        # isolation_level=None: no implicit BEGIN; transactions are explicit (transaction(), prune).
+        self._conn = sqlite3.connect(
+            str(self.db_path), isolation_level=None, check_same_thread=self._check_same_thread
+        )
         self._conn.row_factory = sqlite3.Row
+        self._apply_pragmas()
 
-    def init_schema(self) -> None:
-        """Create tables and indexes if missing."""
+    def _apply_pragmas(self) -> None:
+        """Set page/vacuum/journal/sync/cache PRAGMAs from config. WAL is skipped for in-memory DBs."""
         cur = self._conn.cursor()
-        cur.executescript(
-            SCHEMA_TOKENS + SCHEMA_PAIRS + SCHEMA_SNAPSHOTS
-            + IDX_SNAPSHOTS_PAIR_TS + IDX_SNAPSHOTS_PAIR + IDX_PAIRS_CREATED
-        )
-        self.ensure_dump_watchlist_schema()
-        self.ensure_strategy_schema()
-        self.ensure_app_status_schema()
+        # No-op once the file has pages or is in WAL mode, so they only take effect for a new DB
+        cur.execute(f"PRAGMA page_size={int(config.DB_PAGE_SIZE)}")
+        # Only on an empty file: on an existing one even a same-mode auto_vacuum write waits on the write lock
+        new_file = cur.execute("PRAGMA page_count").fetchone()[0] == 0
+        if new_file and config.DB_AUTO_VACUUM in _AUTO_VACUUM_MODES:
+            cur.execute(f"PRAGMA auto_vacuum={config.DB_AUTO_VACUUM}")
+        if str(self.db_path) != ":memory:":
+            cur.execute(f"PRAGMA journal_mode={config.DB_JOURNAL_MODE}")
+            cur.execute(f"PRAGMA wal_autocheckpoint={int(config.DB_WAL_AUTOCHECKPOINT)}")
+        sync = config.DB_SYNCHRONOUS if config.DB_SYNCHRONOUS in _SYNCHRONOUS_MODES else "NORMAL"
+        cur.execute(f"PRAGMA synchronous={sync}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute(f"PRAGMA mmap_size={int(config.DB_MMAP_SIZE)}")
+        cur.execute(f"PRAGMA cache_size=-{int(config.DB_CACHE_SIZE_KIB)}")
+
+    def _commit(self) -> None:
+        """Commit unless inside transaction(); the outermost block commits instead."""
+        if not self._tx_depth:
+            self._conn.commit()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run the block in one BEGIN IMMEDIATE ... COMMIT; ROLLBACK on error.
+        Nested calls run inside the outer transaction under a SAVEPOINT: an error undoes only the nested block.
+        """
+        if self._tx_depth:
+            savepoint = "sp%d" % self._tx_depth
+            self._conn.execute("SAVEPOINT " + savepoint)
+            self._tx_depth += 1
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK TO " + savepoint)
+                raise
+            finally:
+                self._tx_depth -= 1
+                self._conn.execute("RELEASE " + savepoint)
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._tx_depth = 1
+        try:
+            yield
+        except BaseException:
+            self._tx_depth = 0
+            self._conn.rollback()
+            raise
+        self._tx_depth = 0
         self._conn.commit()
 
+    def init_schema(self) -> None:
+        """
+        Create tables and indexes if missing: all DDL in one script and one transaction (one commit on a new DB).
+        Deferred BEGIN: on a current schema every IF NOT EXISTS is a no-op, so opening never waits on a writer.
+        """
+        try:
+            self._conn.executescript(_INIT_SCHEMA_SQL)
+        except sqlite3.Error:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            raise
+
     def upsert_token(self, token: TokenInfo) -> None:
-        """Insert or replace token by address."""
+        """Insert token or update it in place by address."""
         cur = self._conn.cursor()
-        cur.execute(
-            "INSERT OR REPLACE INTO tokens (address, chain_id, symbol, name) VALUES (?, ?, ?, ?)",
-            (token.address, config.CHAIN_SOLANA, token.symbol, token.name),
-        )
-        self._conn.commit()
+        cur.execute(_UPSERT_TOKEN_SQL, (token.address, config.CHAIN_SOLANA, token.symbol, token.name))
+        self._commit()
+
+    def upsert_tokens_bulk(self, tokens: Iterable[TokenInfo]) -> int:
+        """Upsert many tokens with one executemany; duplicates by address collapse to the last one. Returns rows written."""
+        rows = {t.address: (t.address, config.CHAIN_SOLANA, t.symbol, t.name) for t in tokens}
+        if not rows:
+            return 0
+        cur = self._conn.cursor()
+        with self.transaction():
+            cur.executemany(_UPSERT_TOKEN_SQL, rows.values())
+        return len(rows)
 
     def upsert_pair(self, snapshot: PairSnapshot) -> None:
-        """Insert or replace pair by pair_address."""
+        """Insert pair or update it in place by pair_address."""
         cur = self._conn.cursor()
-        placeholders = ",".join("?" * len(PAIRS_COLUMNS))
-        cur.execute(
-            f"INSERT OR REPLACE INTO pairs ({','.join(PAIRS_COLUMNS)}) VALUES ({placeholders})",
-            _snapshot_to_row(snapshot),
-        )
-        self._conn.commit()
+        cur.execute(_UPSERT_PAIR_SQL, _snapshot_to_row(snapshot))
+        self._commit()
+
+    def upsert_pairs_bulk(self, snapshots: Sequence[PairSnapshot]) -> int:
+        """Upsert many pairs with one executemany; duplicates by pair_address collapse to the last one. Returns rows written."""
+        rows = {s.pair_address: _snapshot_to_row(s) for s in snapshots}
+        if not rows:
+            return 0
+        cur = self._conn.cursor()
+        with self.transaction():
+            cur.executemany(_UPSERT_PAIR_SQL, rows.values())
+        return len(rows)
 
     def insert_snapshot(self, snapshot: PairSnapshot) -> None:
         """Append one snapshot row (history)."""
         cur = self._conn.cursor()
-        placeholders = ",".join("?" * len(SNAPSHOTS_COLUMNS))
-        cur.execute(
-            f"INSERT INTO snapshots ({','.join(SNAPSHOTS_COLUMNS)}) VALUES ({placeholders})",
-            _snapshot_to_row(snapshot),
-        )
-        self._conn.commit()
+        cur.execute(_INSERT_SNAPSHOT_SQL, _snapshot_to_row(snapshot))
+        self._commit()
 
-    def iterate_snapshots(
+    def insert_snapshots_bulk(self, snapshots: Sequence[PairSnapshot]) -> int:
+        """
+        Append many snapshot rows using multi-row INSERT ... VALUES (...),(...) statements.
+        All chunks run in one transaction. Returns number of rows inserted.
+        """
+        if not snapshots:
+            return 0
+        rows_per_stmt = _SNAPSHOT_ROWS_PER_STMT
+        cur = self._conn.cursor()
+        with self.transaction():
+            for i in range(0, len(snapshots), rows_per_stmt):
+                chunk = snapshots[i:i + rows_per_stmt]
+                if len(chunk) == rows_per_stmt:
+                    sql = _INSERT_SNAPSHOTS_CHUNK_SQL
+                else:
+                    sql = _insert_snapshots_sql(len(chunk))
+                cur.execute(sql, list(chain.from_iterable(map(_snapshot_to_row, chunk))))
+        return len(snapshots)
+
+    def _select_cursor(self, sql: str, params: Sequence[Any] = ()) -> tuple[sqlite3.Cursor, list[str]]:
+        """
+        Execute SELECT and return (cursor, column names). Rows are read lazily from the cursor
+        as plain tuples (no sqlite3.Row per row); pair them with the names via zip when needed.
+        """
+        cur = self._conn.cursor()
+        cur.row_factory = None
+        cur.execute(sql, params)
+        return cur, [d[0] for d in cur.description]
+
+    def iterate_snapshots_cursor(
         self,
         pair_address: str | None = None,
         since_ts: int | None = None,
         until_ts: int | None = None,
-    ) -> Generator[dict[str, Any], None, None]:
-        """Yield snapshot rows as dicts for export."""
-        cur = self._conn.cursor()
-        sql = "SELECT * FROM snapshots WHERE 1=1"
+        columns: Sequence[str] | None = None,
+    ) -> tuple[sqlite3.Cursor, list[str]]:
+        """
+        Return (cursor, column names) over snapshot rows ordered by snapshot_ts, for streaming export.
+        columns: select only these (SNAPSHOTS_COLUMNS names); a subset of the covering index columns
+        (e.g. snapshot_ts, price_usd) is then read from idx_snapshots_pair_ts_cover without table lookups.
+        """
+        if columns:
+            unknown = [c for c in columns if c not in _SNAPSHOT_COLUMN_SET]
+            if unknown:
+                raise ValueError(f"Unknown snapshots column(s): {unknown}")
+            sql = f"SELECT {', '.join(columns)} FROM snapshots WHERE 1=1"
+        else:
+            sql = "SELECT * FROM snapshots WHERE 1=1"
         params: list[Any] = []
         if pair_address:
             sql += " AND pair_address = ?"
@@ -423,29 +668,81 @@ class Database:
             sql += " AND snapshot_ts <= ?"
             params.append(until_ts)
         sql += " ORDER BY snapshot_ts ASC"
-        cur.execute(sql, params)
-        for row in cur:
-            yield dict(row)
+        return self._select_cursor(sql, params)
+
+    def iterate_pairs_cursor(self) -> tuple[sqlite3.Cursor, list[str]]:
+        """Return (cursor, column names) over all pairs."""
+        return self._select_cursor("SELECT * FROM pairs")
+
+    def iterate_tokens_cursor(self) -> tuple[sqlite3.Cursor, list[str]]:
+        """Return (cursor, column names) over all tokens."""
+        return self._select_cursor("SELECT * FROM tokens")
+
+    def iterate_snapshots(
+        self,
+        pair_address: str | None = None,
+        since_ts: int | None = None,
+        until_ts: int | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> Generator[dict[str, Any], None, None]:
+        """Yield snapshot rows as dicts for export (only the given columns, if any)."""
+        cur, cols = self.iterate_snapshots_cursor(pair_address, since_ts, until_ts, columns)
+        yield from _dict_rows(cur, cols)
+
+    def iterate_snapshots_columnar(
+        self,
+        pair_address: str | None = None,
+        since_ts: int | None = None,
+        until_ts: int | None = None,
+        batch_size: int = 10_000,
+    ) -> Generator[dict[str, list[Any]], None, None]:
+        """
+        Yield snapshot rows in batches of up to batch_size as column -> list of values
+        (same filters and order as iterate_snapshots), for column-oriented consumers.
+        """
+        cur, cols = self.iterate_snapshots_cursor(pair_address, since_ts, until_ts)
+        cur.arraysize = batch_size
+        while True:
+            rows = cur.fetchmany()
+            if not rows:
+                return
+            yield dict(zip(cols, map(list, zip(*rows))))
 
     def iterate_pairs(self) -> Generator[dict[str, Any], None, None]:
         """Yield all pairs as dicts."""
-        cur = self._conn.cursor()
-        cur.execute("SELECT * FROM pairs")
-        for row in cur:
-            yield dict(row)
+        cur, cols = self.iterate_pairs_cursor()
+        yield from _dict_rows(cur, cols)
 
     def iterate_tokens(self) -> Generator[dict[str, Any], None, None]:
         """Yield all tokens as dicts."""
-        cur = self._conn.cursor()
-        cur.execute("SELECT * FROM tokens")
-        for row in cur:
-            yield dict(row)
+        cur, cols = self.iterate_tokens_cursor()
+        yield from _dict_rows(cur, cols)
 
     def get_known_pair_addresses(self) -> set[str]:
-        """Return set of pair_address from pairs table for deduplication."""
+        """
+        Return set of pair_address from pairs table for deduplication. Read as plain tuples
+        (no sqlite3.Row per row); addresses are interned since the set lives for the whole run.
+        """
         cur = self._conn.cursor()
-        cur.execute("SELECT pair_address FROM pairs")
-        return {row["pair_address"] for row in cur}
+        cur.row_factory = None
+        cur.execute("SELECT pair_address FROM pairs WHERE pair_address IS NOT NULL")
+        return set(map(intern, map(itemgetter(0), cur)))
+
+    def _resolve_prune_cols(self) -> dict[str, str]:
+        """Column names used by prune(), resolved once per connection (one PRAGMA table_info per table)."""
+        if self._prune_cols is None:
+            snap = _pragma_table_info(self._conn, "snapshots")
+            pairs = _pragma_table_info(self._conn, "pairs")
+            tokens = _pragma_table_info(self._conn, "tokens")
+            self._prune_cols = {
+                "snap_ts": _must_pick(snap, "snapshots", config.TS_CANDIDATES, "Timestamp"),
+                "snap_pair_ref": _must_pick(snap, "snapshots", config.SNAP_PAIR_REF_CANDIDATES, "Snapshot pair ref"),
+                "pairs_pair": _must_pick(pairs, "pairs", config.PAIRS_PAIR_CANDIDATES, "Pairs address"),
+                "pairs_base": _must_pick(pairs, "pairs", config.PAIRS_BASE_CANDIDATES, "Pairs base token"),
+                "pairs_quote": _must_pick(pairs, "pairs", config.PAIRS_QUOTE_CANDIDATES, "Pairs quote token"),
+                "tokens_addr": _must_pick(tokens, "tokens", config.TOKENS_ADDR_CANDIDATES, "Tokens address"),
+            }
+        return self._prune_cols
 
     def _ensure_prune_indexes(
         self,
@@ -471,7 +768,7 @@ class Database:
                 cur.execute(sql)
             except Exception:
                 pass
-        self._conn.commit()
+        self._commit()
 
     def prune(
         self,
@@ -483,28 +780,22 @@ class Database:
         """
         Remove old snapshots, orphaned pairs, orphaned tokens.
         Returns (snapshots_deleted, pairs_deleted, tokens_deleted).
-        Uses NOT EXISTS; auto-detects timestamp column and ms/sec.
+        Orphans are found with anti-joins (NOT EXISTS for pairs, NOT IN for tokens); auto-detects timestamp column and ms/sec.
         """
-        snap_ts_col = ts_column or _must_pick(
-            self._conn, "snapshots", config.TS_CANDIDATES, "Timestamp"
-        )
-        snap_pair_ref_col = _must_pick(
-            self._conn, "snapshots", config.SNAP_PAIR_REF_CANDIDATES, "Snapshot pair ref"
-        )
-        pairs_pair_col = _must_pick(
-            self._conn, "pairs", config.PAIRS_PAIR_CANDIDATES, "Pairs address"
-        )
-        pairs_base_col = _must_pick(
-            self._conn, "pairs", config.PAIRS_BASE_CANDIDATES, "Pairs base token"
-        )
-        pairs_quote_col = _must_pick(
-            self._conn, "pairs", config.PAIRS_QUOTE_CANDIDATES, "Pairs quote token"
-        )
-        tokens_addr_col = _must_pick(
-            self._conn, "tokens", config.TOKENS_ADDR_CANDIDATES, "Tokens address"
-        )
-
-        unit = _detect_ms_or_sec(self._conn, "snapshots", snap_ts_col)
+        cols = self._resolve_prune_cols()
+        snap_ts_col = ts_column or cols["snap_ts"]
+        snap_pair_ref_col = cols["snap_pair_ref"]
+        pairs_pair_col = cols["pairs_pair"]
+        pairs_base_col = cols["pairs_base"]
+        pairs_quote_col = cols["pairs_quote"]
+        tokens_addr_col = cols["tokens_addr"]
+
+        unit = self._ts_units.get(snap_ts_col)
+        if unit is None:
+            unit = _detect_ms_or_sec(self._conn, "snapshots", snap_ts_col)
+            if unit == 1000:
+                # ms stays ms; seconds (or an empty table) is re-checked next time
+                self._ts_units[snap_ts_col] = unit
         cutoff = int((time.time() - max_age_hours * 3600) * unit)
 
         self._ensure_prune_indexes(
@@ -555,10 +846,10 @@ class Database:
                 t_cnt = cur.execute(
                     f"""
                     SELECT COUNT(*) FROM tokens
-                    WHERE NOT EXISTS (
-                        SELECT 1 FROM pairs p
-                        WHERE p.{pairs_base_col} = tokens.{tokens_addr_col}
-                           OR p.{pairs_quote_col} = tokens.{tokens_addr_col}
+                    WHERE {tokens_addr_col} NOT IN (
+                        SELECT {pairs_base_col} FROM pairs WHERE {pairs_base_col} IS NOT NULL
+                        UNION
+                        SELECT {pairs_quote_col} FROM pairs WHERE {pairs_quote_col} IS NOT NULL
                     )
                     """
                 ).fetchone()[0]
@@ -566,10 +857,10 @@ class Database:
                 cur.execute(
                     f"""
                     DELETE FROM tokens
-                    WHERE NOT EXISTS (
-                        SELECT 1 FROM pairs p
-                        WHERE p.{pairs_base_col} = tokens.{tokens_addr_col}
-                           OR p.{pairs_quote_col} = tokens.{tokens_addr_col}
+                    WHERE {tokens_addr_col} NOT IN (
+                        SELECT {pairs_base_col} FROM pairs WHERE {pairs_base_col} IS NOT NULL
+                        UNION
+                        SELECT {pairs_quote_col} FROM pairs WHERE {pairs_quote_col} IS NOT NULL
                     )
                     """
                 )
@@ -578,7 +869,7 @@ class Database:
             if dry_run:
                 pass
             else:
-                self._conn.commit()
+                self._commit()
                 if vacuum:
                     self._conn.execute("VACUUM")
 
@@ -599,23 +890,20 @@ class Database:
         Remove pairs older than max_age_hours (by pair_created_at_ms) and orphan tokens.
         Returns (snapshots_deleted, pairs_deleted, tokens_deleted).
         """
-        cutoff_ms = int((time.time() - max_age_hours * 3600) * 1000)
+        cutoff_ms = time.time_ns() // 1_000_000 - int(max_age_hours * 3_600_000)
         cur = self._conn.cursor()
 
-        if not dry_run:
-            self._conn.execute("BEGIN IMMEDIATE")
-
-        try:
+        # Deletes run in one transaction (joins the caller's, e.g. auto_prune); dry run only reads
+        with (nullcontext() if dry_run else self.transaction()):
             if dry_run:
                 s_cnt = cur.execute(
                     """
                     SELECT COUNT(*) FROM snapshots
-                    WHERE EXISTS (
-                        SELECT 1 FROM pairs p
-                        WHERE p.pair_address = snapshots.pair_address
-                          AND p.pair_created_at_ms < ?
-                          AND p.pair_created_at_ms IS NOT NULL
-                          AND p.pair_created_at_ms != 0
+                    WHERE pair_address IN (
+                        SELECT pair_address FROM pairs
+                        WHERE pair_created_at_ms < ?
+                          AND pair_created_at_ms IS NOT NULL
+                          AND pair_created_at_ms != 0
                     )
                     """,
                     (cutoff_ms,),
@@ -624,12 +912,11 @@ class Database:
                 cur.execute(
                     """
                     DELETE FROM snapshots
-                    WHERE EXISTS (
-                        SELECT 1 FROM pairs p
-                        WHERE p.pair_address = snapshots.pair_address
-                          AND p.pair_created_at_ms < ?
-                          AND p.pair_created_at_ms IS NOT NULL
-                          AND p.pair_created_at_ms != 0
+                    WHERE pair_address IN (
+                        SELECT pair_address FROM pairs
+                        WHERE pair_created_at_ms < ?
+                          AND pair_created_at_ms IS NOT NULL
+                          AND pair_created_at_ms != 0
                     )
                     """,
                     (cutoff_ms,),
@@ -659,42 +946,15 @@ class Database:
                 p_cnt = cur.rowcount
 
             if dry_run:
-                t_cnt = cur.execute(
-                    """
-                    SELECT COUNT(*) FROM tokens
-                    WHERE NOT EXISTS (
-                        SELECT 1 FROM pairs p
-                        WHERE p.base_address = tokens.address
-                           OR p.quote_address = tokens.address
-                    )
-                    """
-                ).fetchone()[0]
+                t_cnt = cur.execute("SELECT COUNT(*) FROM tokens" + _ORPHAN_TOKENS_WHERE).fetchone()[0]
             else:
-                cur.execute(
-                    """
-                    DELETE FROM tokens
-                    WHERE NOT EXISTS (
-                        SELECT 1 FROM pairs p
-                        WHERE p.base_address = tokens.address
-                           OR p.quote_address = tokens.address
-                    )
-                    """
-                )
+                cur.execute("DELETE FROM tokens" + _ORPHAN_TOKENS_WHERE)
                 t_cnt = cur.rowcount
 
-            if dry_run:
-                pass
-            else:
-                self._conn.commit()
-                if vacuum:
-                    self._conn.execute("VACUUM")
+        if not dry_run and vacuum and not self._tx_depth:
+            self._conn.execute("VACUUM")
 
-            return int(s_cnt), int(p_cnt), int(t_cnt)
-
-        except Exception:
-            if not dry_run:
-                self._conn.rollback()
-            raise
+        return int(s_cnt), int(p_cnt), int(t_cnt)
 
     def self_check_invariants(self) -> tuple[int, int, int]:
         """
@@ -702,64 +962,49 @@ class Database:
         Returns (old_pairs, old_pairs_snapshots, orphan_tokens).
         """
         cutoff_ms = int((time.time() - config.SELF_CHECK_AGE_HOURS * 3600) * 1000)
-        cur = self._conn.cursor()
-        a = cur.execute(
-            """
-            SELECT COUNT(*) FROM pairs
-            WHERE pair_created_at_ms IS NOT NULL
-              AND pair_created_at_ms > 0
-              AND pair_created_at_ms < ?
-            """,
-            (cutoff_ms,),
-        ).fetchone()[0]
-        b = cur.execute(
-            """
-            SELECT COUNT(*) FROM snapshots s
-            WHERE EXISTS (
-              SELECT 1 FROM pairs p
-              WHERE p.pair_address = s.pair_address
-                AND p.pair_created_at_ms IS NOT NULL
-                AND p.pair_created_at_ms > 0
-                AND p.pair_created_at_ms < ?
-            )
-            """,
-            (cutoff_ms,),
-        ).fetchone()[0]
-        c = cur.execute(
-            """
-            SELECT COUNT(*) FROM tokens t
-            WHERE NOT EXISTS (
-              SELECT 1 FROM pairs p
-              WHERE p.base_address = t.address OR p.quote_address = t.address
-            )
-            """
-        ).fetchone()[0]
+        a, b, c = self._conn.execute(_SELF_CHECK_SQL, (cutoff_ms, cutoff_ms)).fetchone()
         return int(a), int(b), int(c)
 
     def ensure_dump_watchlist_schema(self) -> None:
         """Create dump_watchlist table and indexes if missing."""
         cur = self._conn.cursor()
-        cur.executescript(
-            SCHEMA_DUMP_WATCHLIST + IDX_DUMP_WATCHLIST_STATE + IDX_DUMP_WATCHLIST_UPDATED
-        )
-        self._conn.commit()
+        cur.executescript(_DUMP_WATCHLIST_DDL)
+        self._commit()
 
-    def update_dump_watchlist_for_snapshot(self, pair_address: str) -> None:
+    def update_dump_watchlist_for_snapshot(self, pair_address: str, now_ms: int | None = None) -> None:
         """
         Update dump watchlist for a pair: detect dump (>=50% from peak), track low, signal reversal.
         Uses config thresholds: DROP_THRESHOLD, LIQ_MIN, VOL_M5_MIN, SELLS_MIN.
+        Reads and state transitions run in one transaction (the caller's, if one is open).
+        now_ms: row update time; batch callers pass one value for the whole batch (default: current time).
         """
+        if now_ms is None:
+            now_ms = time.time_ns() // 1_000_000
+        if self._tx_depth:
+            self._update_dump_watchlist(pair_address, now_ms)
+            return
+        with self.transaction():
+            self._update_dump_watchlist(pair_address, now_ms)
+
+    def _update_dump_watchlist(self, pair_address: str, now_ms: int) -> None:
+        """Body of update_dump_watchlist_for_snapshot; runs inside a transaction, never commits."""
         cur = self._conn.cursor()
 
-        last_row = cur.execute(
-            """
-            SELECT price_usd, volume_m5, txns_m5_buys, txns_m5_sells, snapshot_ts
-            FROM snapshots WHERE pair_address=? ORDER BY snapshot_ts DESC LIMIT 1
-            """,
-            (pair_address,),
-        ).fetchone()
-        if not last_row:
+        # Last two snapshots ('r', newest first), the peak snapshot ('p') and pair liquidity ('l') in one round-trip
+        two_rows: list[sqlite3.Row] = []
+        peak_row = None
+        liq_usd = None
+        for row in cur.execute(_WATCHLIST_INPUTS_SQL, (pair_address, pair_address, pair_address)):
+            kind = row["kind"]
+            if kind == "r":
+                two_rows.append(row)
+            elif kind == "p":
+                peak_row = row
+            else:
+                liq_usd = row["price_usd"]
+        if not two_rows:
             return
+        last_row = two_rows[0]
 
         last_price = last_row["price_usd"]
         last_ts = last_row["snapshot_ts"]
@@ -769,18 +1014,6 @@ class Database:
 
         if last_price is None or last_price <= 0:
             return
-
-        peak_row = cur.execute(
-            """
-            SELECT price_usd, snapshot_ts
-            FROM snapshots
-            WHERE pair_address=?
-              AND price_usd IS NOT NULL AND price_usd > 0
-            ORDER BY price_usd DESC, snapshot_ts DESC
-            LIMIT 1
-            """,
-            (pair_address,),
-        ).fetchone()
         if not peak_row:
             return
 
@@ -789,63 +1022,32 @@ class Database:
 
         drop_pct = (peak_price - last_price) / peak_price * 100.0
 
-        pair_row = cur.execute(
-            "SELECT liquidity_usd FROM pairs WHERE pair_address=?", (pair_address,)
-        ).fetchone()
-        liq = float(pair_row["liquidity_usd"]) if pair_row and pair_row["liquidity_usd"] is not None else 0.0
+        liq = float(liq_usd) if liq_usd is not None else 0.0
         vol = volume_m5 if volume_m5 is not None else 0.0
         sells = int(sells_m5) if sells_m5 is not None else 0
 
-        now_ms = int(time.time() * 1000)
-
-        two_rows = cur.execute(
-            """
-            SELECT price_usd, txns_m5_buys, txns_m5_sells, volume_m5, snapshot_ts
-            FROM snapshots WHERE pair_address=? ORDER BY snapshot_ts DESC LIMIT 2
-            """,
-            (pair_address,),
-        ).fetchall()
-
-        existing = cur.execute(
-            "SELECT pair_address, low_price, low_ts, state, signal_ts FROM dump_watchlist WHERE pair_address=?",
-            (pair_address,),
-        ).fetchone()
-
-        if existing:
-            cur_row = dict(existing)
-            low_price = float(cur_row["low_price"])
-            low_ts = int(cur_row["low_ts"])
-            state = cur_row["state"]
-            signal_ts = cur_row["signal_ts"]
-
-            cur.execute(
-                """
-                UPDATE dump_watchlist SET
-                    updated_at_ms=?, last_price=?, last_ts=?, drop_pct=?,
-                    volume_m5=?, buys_m5=?, sells_m5=?,
-                    peak_price=?, peak_ts=?
-                WHERE pair_address=? AND peak_price < ?
-                """,
-                (now_ms, last_price, last_ts, drop_pct, volume_m5, buys_m5, sells_m5, peak_price, peak_ts, pair_address, peak_price),
-            )
-
-            if last_price < low_price:
-                low_price = last_price
-                low_ts = last_ts
-                cur.execute(
-                    "UPDATE dump_watchlist SET low_price=?, low_ts=? WHERE pair_address=?",
-                    (low_price, low_ts, pair_address),
-                )
+        # One UPDATE for the whole row: SET expressions see the old peak/low values
+        update_params = (
+            now_ms, last_price, last_ts, drop_pct, volume_m5, buys_m5, sells_m5,
+            peak_price, peak_ts, peak_price, peak_price,
+            last_price, last_ts, last_price, last_price,
+            pair_address,
+        )
+        if _HAS_RETURNING:
+            row = cur.execute(_UPDATE_DUMP_WATCHLIST_SQL + " RETURNING state, low_price, signal_ts", update_params).fetchone()
+        else:
+            row = None
+            if cur.execute("SELECT 1 FROM dump_watchlist WHERE pair_address=?", (pair_address,)).fetchone():
+                cur.execute(_UPDATE_DUMP_WATCHLIST_SQL, update_params)
+                row = cur.execute(
+                    "SELECT state, low_price, signal_ts FROM dump_watchlist WHERE pair_address=?",
+                    (pair_address,),
+                ).fetchone()
 
-            cur.execute(
-                """
-                UPDATE dump_watchlist SET
-                    updated_at_ms=?, last_price=?, last_ts=?, drop_pct=?,
-                    volume_m5=?, buys_m5=?, sells_m5=?
-                WHERE pair_address=?
-                """,
-                (now_ms, last_price, last_ts, drop_pct, volume_m5, buys_m5, sells_m5, pair_address),
-            )
+        if row is not None:
+            state = row["state"]
+            low_price = float(row["low_price"])
+            signal_ts = row["signal_ts"]
         else:
             if drop_pct < config.DROP_THRESHOLD or liq < config.LIQ_MIN or vol < config.VOL_M5_MIN or sells < config.SELLS_MIN:
                 return
@@ -865,22 +1067,9 @@ class Database:
                 ),
             )
             low_price = last_price
-            low_ts = last_ts
             state = "DUMPING"
             signal_ts = None
 
-        self._conn.commit()
-
-        row = cur.execute(
-            "SELECT state, low_price, signal_ts FROM dump_watchlist WHERE pair_address=?",
-            (pair_address,),
-        ).fetchone()
-        if not row:
-            return
-        state = row["state"]
-        low_price = float(row["low_price"])
-        signal_ts = row["signal_ts"]
-
         buys = int(buys_m5) if buys_m5 is not None else 0
         sells = int(sells_m5) if sells_m5 is not None else 0
 
@@ -901,7 +1090,6 @@ class Database:
                     (pair_address,),
                 )
                 state = "BOTTOMING"
-                self._conn.commit()
 
         vol_safe = vol if vol is not None else 0.0
         prev_vol = float(two_rows[1]["volume_m5"]) if len(two_rows) >= 2 and two_rows[1]["volume_m5"] is not None else 0.0
@@ -918,59 +1106,85 @@ class Database:
                 """,
                 (last_ts, last_price, pair_address),
             )
-            self._conn.commit()
 
     def prune_dump_watchlist(self, ttl_hours: float = config.DUMP_WATCHLIST_TTL_HOURS) -> int:
         """
         Remove expired entries (by updated_at_ms TTL) and orphaned entries (pair not in pairs).
         Returns number of rows deleted.
         """
-        now_ms = int(time.time() * 1000)
-        cutoff_ms = now_ms - int(ttl_hours * 3600 * 1000)
+        cutoff_ms = time.time_ns() // 1_000_000 - int(ttl_hours * 3_600_000)
         cur = self._conn.cursor()
 
-        cur.execute(
-            """
-            DELETE FROM dump_watchlist
-            WHERE updated_at_ms < ?
-            """,
-            (cutoff_ms,),
-        )
-        ttl_cnt = cur.rowcount
+        with self.transaction():
+            cur.execute(
+                """
+                DELETE FROM dump_watchlist
+                WHERE updated_at_ms < ?
+                """,
+                (cutoff_ms,),
+            )
+            ttl_cnt = cur.rowcount
 
-        cur.execute(
-            """
-            DELETE FROM dump_watchlist
-            WHERE NOT EXISTS (
-              SELECT 1 FROM pairs p
-              WHERE p.pair_address = dump_watchlist.pair_address
+            cur.execute(
+                """
+                DELETE FROM dump_watchlist
+                WHERE NOT EXISTS (
+                  SELECT 1 FROM pairs p
+                  WHERE p.pair_address = dump_watchlist.pair_address
+                )
+                """
             )
-            """
-        )
-        orphan_cnt = cur.rowcount
+            orphan_cnt = cur.rowcount
 
-        self._conn.commit()
         return ttl_cnt + orphan_cnt
 
-    def iterate_dump_watchlist(
+    def auto_prune(
+        self,
+        max_age_hours: float = config.DEFAULT_PRUNE_MAX_AGE_HOURS,
+        ttl_hours: float = config.DUMP_WATCHLIST_TTL_HOURS,
+    ) -> tuple[int, int, int, int]:
+        """
+        prune_by_pair_age + prune_dump_watchlist in a single transaction (one commit).
+        Returns (snapshots_deleted, pairs_deleted, tokens_deleted, dump_watchlist_deleted).
+        """
+        with self.transaction():
+            s_cnt, p_cnt, t_cnt = self.prune_by_pair_age(max_age_hours=max_age_hours)
+            dw_cnt = self.prune_dump_watchlist(ttl_hours=ttl_hours)
+        if (s_cnt or p_cnt or t_cnt or dw_cnt) and not self._tx_depth:
+            # Return freed pages to the OS; no-op unless the file has auto_vacuum=INCREMENTAL.
+            # executescript steps the pragma to completion (execute() frees a single page).
+            self._conn.executescript(f"PRAGMA incremental_vacuum({int(config.DB_INCREMENTAL_VACUUM_PAGES)});")
+        return s_cnt, p_cnt, t_cnt, dw_cnt
+
+    def iterate_dump_watchlist_cursor(
         self,
         state: str | None = None,
         limit: int | None = None,
-    ) -> Generator[dict[str, Any], None, None]:
-        """Yield dump_watchlist rows as dicts."""
-        cur = self._conn.cursor()
-        sql = "SELECT * FROM dump_watchlist WHERE 1=1"
+    ) -> tuple[sqlite3.Cursor, list[str]]:
+        """
+        Return (cursor, column names) over dump_watchlist rows, newest update first.
+        With state: pinned to idx_dump_watchlist_state_updated (equality on state, then already in updated_at_ms order: no sort).
+        """
         params: list[Any] = []
         if state:
-            sql += " AND state = ?"
+            sql = "SELECT * FROM dump_watchlist INDEXED BY idx_dump_watchlist_state_updated WHERE state = ?"
             params.append(state)
+        else:
+            sql = "SELECT * FROM dump_watchlist"
         sql += " ORDER BY updated_at_ms DESC"
         if limit is not None and limit > 0:
             sql += " LIMIT ?"
             params.append(limit)
-        cur.execute(sql, params)
-        for row in cur:
-            yield dict(row)
+        return self._select_cursor(sql, params)
+
+    def iterate_dump_watchlist(
+        self,
+        state: str | None = None,
+        limit: int | None = None,
+    ) -> Generator[dict[str, Any], None, None]:
+        """Yield dump_watchlist rows as dicts."""
+        cur, cols = self.iterate_dump_watchlist_cursor(state=state, limit=limit)
+        yield from _dict_rows(cur, cols)
 
     # --- Price history (from snapshots; no %change) ---
 
@@ -1218,27 +1432,15 @@ class Database:
     def ensure_strategy_schema(self) -> None:
         """Create strategy_decisions, strategy_latest, signal_cooldowns, signal_events, signal_evaluations tables and indexes if missing."""
         cur = self._conn.cursor()
-        cur.executescript(
-            SCHEMA_STRATEGY_DECISIONS
-            + IDX_STRATEGY_DECISIONS_PAIR
-            + IDX_STRATEGY_DECISIONS_DECIDED
-            + SCHEMA_STRATEGY_LATEST
-            + SCHEMA_SIGNAL_COOLDOWNS
-            + SCHEMA_SIGNAL_EVENTS
-            + IDX_SIGNAL_EVENTS_PAIR
-            + IDX_SIGNAL_EVENTS_TS
-            + SCHEMA_SIGNAL_EVALUATIONS
-            + IDX_SIGNAL_EVALUATIONS_SIGNAL
-            + IDX_SIGNAL_EVALUATIONS_STATUS
-        )
+        cur.executescript(_STRATEGY_DDL)
         self.ensure_trigger_eval_schema()
-        self._conn.commit()
+        self._commit()
 
     def ensure_trigger_eval_schema(self) -> None:
         """Create signal_trigger_evaluations table and index if missing."""
         cur = self._conn.cursor()
-        cur.executescript(SCHEMA_SIGNAL_TRIGGER_EVALUATIONS + IDX_SIGNAL_TRIGGER_EVALS_STATUS)
-        self._conn.commit()
+        cur.executescript(_TRIGGER_EVAL_DDL)
+        self._commit()
 
     def insert_strategy_decision(
         self,
@@ -1249,35 +1451,38 @@ class Database:
         drop_from_ath: float | None,
         reasons_json: str | None = None,
     ) -> None:
-        """Append one strategy decision row and UPSERT strategy_latest for fast last-status queries."""
-        cur = self._conn.cursor()
-        decided_at = int(time.time() * 1000)
-        cur.execute(
-            """
-            INSERT INTO strategy_decisions
-            (pair_address, decided_at, decision, current_price, ath_price, drop_from_ath, reasons_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (pair_address, decided_at, decision, current_price, ath_price, drop_from_ath, reasons_json),
-        )
-        # UPSERT strategy_latest (last_score = drop_from_ath for sorting)
-        cur.execute(
-            """
-            INSERT INTO strategy_latest
-            (pair_address, last_decision, last_score, last_drop_from_ath, last_current_price, last_ath_price, last_decided_at, last_reasons_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(pair_address) DO UPDATE SET
-                last_decision = excluded.last_decision,
-                last_score = excluded.last_score,
-                last_drop_from_ath = excluded.last_drop_from_ath,
-                last_current_price = excluded.last_current_price,
-                last_ath_price = excluded.last_ath_price,
-                last_decided_at = excluded.last_decided_at,
-                last_reasons_json = excluded.last_reasons_json
-            """,
-            (pair_address, decision, drop_from_ath, drop_from_ath, current_price, ath_price, decided_at, reasons_json),
-        )
-        self._conn.commit()
+        """
+        Append one strategy decision row and UPSERT strategy_latest for fast last-status queries.
+        Both writes commit together (one transaction, or a savepoint inside the caller's).
+        """
+        with self.transaction():
+            cur = self._conn.cursor()
+            decided_at = int(time.time() * 1000)
+            cur.execute(
+                """
+                INSERT INTO strategy_decisions
+                (pair_address, decided_at, decision, current_price, ath_price, drop_from_ath, reasons_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (pair_address, decided_at, decision, current_price, ath_price, drop_from_ath, reasons_json),
+            )
+            # UPSERT strategy_latest (last_score = drop_from_ath for sorting)
+            cur.execute(
+                """
+                INSERT INTO strategy_latest
+                (pair_address, last_decision, last_score, last_drop_from_ath, last_current_price, last_ath_price, last_decided_at, last_reasons_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(pair_address) DO UPDATE SET
+                    last_decision = excluded.last_decision,
+                    last_score = excluded.last_score,
+                    last_drop_from_ath = excluded.last_drop_from_ath,
+                    last_current_price = excluded.last_current_price,
+                    last_ath_price = excluded.last_ath_price,
+                    last_decided_at = excluded.last_decided_at,
+                    last_reasons_json = excluded.last_reasons_json
+                """,
+                (pair_address, decision, drop_from_ath, drop_from_ath, current_price, ath_price, decided_at, reasons_json),
+            )
 
     def get_last_signal_at(self, pair_address: str) -> int | None:
         """Return last_signal_at (unix ms) for pair from signal_cooldowns, or None."""
@@ -1295,10 +1500,11 @@ class Database:
         cur = self._conn.cursor()
         now_ms = int(time.time() * 1000)
         cur.execute(
-            "INSERT OR REPLACE INTO signal_cooldowns (pair_address, last_signal_at) VALUES (?, ?)",
+            "INSERT INTO signal_cooldowns (pair_address, last_signal_at) VALUES (?, ?) "
+            "ON CONFLICT(pair_address) DO UPDATE SET last_signal_at = excluded.last_signal_at",
             (pair_address, now_ms),
         )
-        self._conn.commit()
+        self._commit()
 
     def insert_signal_event(
         self,
@@ -1320,7 +1526,7 @@ class Database:
             (pair_address, signal_ts, entry_price, ath_price, drop_from_ath, score, features_json),
         )
         signal_id = cur.lastrowid
-        self._conn.commit()
+        self._commit()
         return signal_id or 0
 
     def insert_signal_evaluation(
@@ -1338,7 +1544,7 @@ class Database:
             """,
             (signal_id, horizon_sec, status),
         )
-        self._conn.commit()
+        self._commit()
 
     def iter_pending_evaluations(
         self,
@@ -1390,7 +1596,7 @@ class Database:
             """,
             (evaluated_at, price_end, max_price, min_price, return_end_pct, max_return_pct, min_return_pct, eval_id),
         )
-        self._conn.commit()
+        self._commit()
 
     def update_evaluation_no_data(self, eval_id: int) -> None:
         """Update signal_evaluation to NO_DATA."""
@@ -1399,7 +1605,7 @@ class Database:
             "UPDATE signal_evaluations SET status = 'NO_DATA' WHERE id = ?",
             (eval_id,),
         )
-        self._conn.commit()
+        self._commit()
 
     # --- Trigger-based evaluations ---
 
@@ -1414,7 +1620,7 @@ class Database:
             """,
             (signal_id,),
         )
-        self._conn.commit()
+        self._commit()
 
     def iter_pending_trigger_evals(self, limit: int = 100) -> Generator[dict[str, Any], None, None]:
         """Yield PENDING trigger evals: signal_id and signal_event fields (pair_address, signal_ts, entry_price)."""
@@ -1486,7 +1692,7 @@ class Database:
                 signal_id,
             ),
         )
-        self._conn.commit()
+        self._commit()
 
     def update_trigger_eval_no_data(self, signal_id: int, reason: str | None = None) -> None:
         """Update signal_trigger_evaluation to NO_DATA."""
@@ -1495,7 +1701,7 @@ class Database:
             "UPDATE signal_trigger_evaluations SET status = 'NO_DATA', evaluated_at = ? WHERE signal_id = ?",
             (int(time.time() * 1000), signal_id),
         )
-        self._conn.commit()
+        self._commit()
 
     def get_signal_event_counts(self) -> tuple[int, int, int, int]:
         """Return (signal_events_count, pending_count, done_count, no_data_count)."""
@@ -1517,7 +1723,7 @@ class Database:
         """Create app_status table if missing."""
         cur = self._conn.cursor()
         cur.executescript(SCHEMA_APP_STATUS)
-        self._conn.commit()
+        self._commit()
 
     def update_app_status(
         self,
@@ -1535,49 +1741,50 @@ class Database:
         """
         now_ms = int(time.time() * 1000)
         cur = self._conn.cursor()
-        cur.execute("SELECT id FROM app_status WHERE id = 1")
-        row = cur.fetchone()
-        if not row:
-            cur.execute(
-                """
-                INSERT INTO app_status (id, updated_at_ms, last_cycle_started_at_ms, last_cycle_finished_at_ms, last_error, last_error_at_ms, counters_json)
-                VALUES (1, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    now_ms,
-                    last_cycle_started_at_ms if last_cycle_started_at_ms is not None else now_ms,
-                    last_cycle_finished_at_ms,
-                    last_error,
-                    last_error_at_ms,
-                    counters_json,
-                ),
-            )
-        else:
-            updates = ["updated_at_ms = ?"]
-            params: list[Any] = [now_ms]
-            if last_cycle_started_at_ms is not None:
-                updates.append("last_cycle_started_at_ms = ?")
-                params.append(last_cycle_started_at_ms)
-            if last_cycle_finished_at_ms is not None:
-                updates.append("last_cycle_finished_at_ms = ?")
-                params.append(last_cycle_finished_at_ms)
-            if last_error is not None:
-                updates.append("last_error = ?")
-                params.append(last_error)
-                if last_error == "":
-                    updates.append("last_error_at_ms = NULL")
-            if last_error_at_ms is not None:
-                updates.append("last_error_at_ms = ?")
-                params.append(last_error_at_ms)
-            if counters_json is not None:
-                updates.append("counters_json = ?")
-                params.append(counters_json)
-            params.append(1)
-            cur.execute(
-                "UPDATE app_status SET " + ", ".join(updates) + " WHERE id = ?",
-                params,
-            )
-        self._conn.commit()
+        # Existence check and write in one transaction: no second writer can insert id=1 in between
+        with self.transaction():
+            cur.execute("SELECT id FROM app_status WHERE id = 1")
+            row = cur.fetchone()
+            if not row:
+                cur.execute(
+                    """
+                    INSERT INTO app_status (id, updated_at_ms, last_cycle_started_at_ms, last_cycle_finished_at_ms, last_error, last_error_at_ms, counters_json)
+                    VALUES (1, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        now_ms,
+                        last_cycle_started_at_ms if last_cycle_started_at_ms is not None else now_ms,
+                        last_cycle_finished_at_ms,
+                        last_error,
+                        last_error_at_ms,
+                        counters_json,
+                    ),
+                )
+            else:
+                updates = ["updated_at_ms = ?"]
+                params: list[Any] = [now_ms]
+                if last_cycle_started_at_ms is not None:
+                    updates.append("last_cycle_started_at_ms = ?")
+                    params.append(last_cycle_started_at_ms)
+                if last_cycle_finished_at_ms is not None:
+                    updates.append("last_cycle_finished_at_ms = ?")
+                    params.append(last_cycle_finished_at_ms)
+                if last_error is not None:
+                    updates.append("last_error = ?")
+                    params.append(last_error)
+                    if last_error == "":
+                        updates.append("last_error_at_ms = NULL")
+                if last_error_at_ms is not None:
+                    updates.append("last_error_at_ms = ?")
+                    params.append(last_error_at_ms)
+                if counters_json is not None:
+                    updates.append("counters_json = ?")
+                    params.append(counters_json)
+                params.append(1)
+                cur.execute(
+                    "UPDATE app_status SET " + ", ".join(updates) + " WHERE id = ?",
+                    params,
+                )
 
     def get_app_status(self) -> dict[str, Any] | None:
         """Return singleton app_status row as dict, or None if not present."""
@@ -1588,6 +1795,30 @@ class Database:
             return dict(row)
         return None
 
+    def checkpoint(self, mode: str = "TRUNCATE") -> tuple[int, int, int]:
+        """
+        Copy the WAL into the DB file (PRAGMA wal_checkpoint); TRUNCATE also resets the -wal file to zero bytes.
+        No-op inside transaction(). Returns (busy, wal_frames, checkpointed_frames); (0, -1, -1) when not in WAL mode.
+        """
+        if self._tx_depth:
+            return 0, -1, -1
+        mode = mode.upper()
+        if mode not in _CHECKPOINT_MODES:
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        busy, log, done = self._conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return int(busy), int(log), int(done)
+
+    def checkpoint_if_wal_large(self, max_bytes: int = config.DB_WAL_TRUNCATE_BYTES) -> bool:
+        """checkpoint("TRUNCATE") when the -wal file is larger than max_bytes. Returns True if it ran."""
+        try:
+            wal_size = Path(str(self.db_path) + "-wal").stat().st_size
+        except OSError:
+            return False
+        if wal_size <= max_bytes or self._tx_depth:
+            return False
+        self.checkpoint("TRUNCATE")
+        return True
+
     def close(self) -> None:
         """Close DB connection."""
         if self._conn:
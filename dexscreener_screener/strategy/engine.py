@@ -320,42 +320,44 @@ class StrategyEngine:
                 continue
 
             if decision == "SIGNAL":
-                last_signal = self.db.get_last_signal_at(pair_address)
-                if last_signal is not None:
-                    if (now_ms - last_signal) / 1000 < config.SIGNAL_COOLDOWN_SEC:
-                        continue
-                signals.append(entry)
-                self.db.insert_strategy_decision(
-                    pair_address=pair_address,
-                    decision="SIGNAL",
-                    current_price=current_price,
-                    ath_price=ath_price,
-                    drop_from_ath=drop_from_ath,
-                    reasons_json=json.dumps({
-                        **base_reasons,
-                        "txns": txns_h24,
-                        "buys": buys_h24,
-                        "liq": liq,
-                    }),
-                )
-                self.db.set_signal_cooldown(pair_address)
-                signal_id = self.db.insert_signal_event(
-                    pair_address=pair_address,
-                    signal_ts=now_ms,
-                    entry_price=current_price,
-                    ath_price=ath_price,
-                    drop_from_ath=drop_from_ath,
-                    score=score,
-                    features_json=json.dumps({
-                        "liquidity_usd": liq,
-                        "volume_h24": vol,
-                        "txns_h24": txns_h24,
-                        "buys_h24": buys_h24,
-                    }),
-                )
-                self.db.insert_trigger_eval_pending(signal_id)
-                for horizon_sec in config.POST_HORIZONS_SEC:
-                    self.db.insert_signal_evaluation(signal_id=signal_id, horizon_sec=horizon_sec, status="PENDING")
+                # Cooldown check and every SIGNAL write commit together: no half-recorded signal on error
+                with self.db.transaction():
+                    last_signal = self.db.get_last_signal_at(pair_address)
+                    if last_signal is not None:
+                        if (now_ms - last_signal) / 1000 < config.SIGNAL_COOLDOWN_SEC:
+                            continue
+                    signals.append(entry)
+                    self.db.insert_strategy_decision(
+                        pair_address=pair_address,
+                        decision="SIGNAL",
+                        current_price=current_price,
+                        ath_price=ath_price,
+                        drop_from_ath=drop_from_ath,
+                        reasons_json=json.dumps({
+                            **base_reasons,
+                            "txns": txns_h24,
+                            "buys": buys_h24,
+                            "liq": liq,
+                        }),
+                    )
+                    self.db.set_signal_cooldown(pair_address)
+                    signal_id = self.db.insert_signal_event(
+                        pair_address=pair_address,
+                        signal_ts=now_ms,
+                        entry_price=current_price,
+                        ath_price=ath_price,
+                        drop_from_ath=drop_from_ath,
+                        score=score,
+                        features_json=json.dumps({
+                            "liquidity_usd": liq,
+                            "volume_h24": vol,
+                            "txns_h24": txns_h24,
+                            "buys_h24": buys_h24,
+                        }),
+                    )
+                    self.db.insert_trigger_eval_pending(signal_id)
+                    for horizon_sec in config.POST_HORIZONS_SEC:
+                        self.db.insert_signal_evaluation(signal_id=signal_id, horizon_sec=horizon_sec, status="PENDING")
                 continue
 
             # Watchlist level
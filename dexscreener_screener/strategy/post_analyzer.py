@@ -53,6 +53,7 @@ def run_post_analysis(db_path: str, now_ts: int | None = None) -> tuple[int, int
                     pair_address=pair_address,
                     since_ts=since_ts,
                     until_ts=until_ts,
+                    columns=("price_usd",),
                 )
             )
 
@@ -58,6 +58,7 @@ def run_trigger_analysis(
                     pair_address=pair_address,
                     since_ts=since_ts,
                     until_ts=until_ts,
+                    columns=("snapshot_ts", "price_usd"),
                 )
             )
 
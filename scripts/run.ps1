@@ -55,6 +55,16 @@ sys.exit(main())
     return $err
 }
 
+function _refreshLock {
+    param([string]$DbPath, [string]$ProjRoot)
+    python -c "
+import sys
+sys.path.insert(0, r'$($ProjRoot -replace '\\', '/')')
+from dexscreener_screener.core.lock import refresh_db_lock
+refresh_db_lock(r'$($DbPath -replace '\\', '/')')
+" 2>&1
+}
+
 if ($Mode -eq "loop") {
     $pidToLock = $PID
     python -c "
@@ -68,12 +78,23 @@ sys.exit(0 if ok else 1)
         Write-Host "Another process holds the lock for this DB. Refusing to start. (Use once mode or another DbPath.)"
         exit 2
     }
+    # Heartbeat (config.DB_LOCK_HEARTBEAT_SEC = 30): the cycle's python commands refresh the lock
+    # while they run (DEXSCREENER_DB_LOCK_HEARTBEAT=1), this loop before each cycle and every 30 s of sleep
+    $env:DEXSCREENER_DB_LOCK_HEARTBEAT = "1"
     try {
         while ($true) {
+            _refreshLock -DbPath $dbAbs -ProjRoot $projRoot
             $ec = _runOneCycle -DbPath $dbAbs -PairsFile $PairsFile -ProjRoot $projRoot
-            Start-Sleep -Seconds $IntervalSec
+            $left = $IntervalSec
+            while ($left -gt 0) {
+                _refreshLock -DbPath $dbAbs -ProjRoot $projRoot
+                $step = [Math]::Min($left, 30)
+                Start-Sleep -Seconds $step
+                $left -= $step
+            }
         }
     } finally {
+        Remove-Item Env:DEXSCREENER_DB_LOCK_HEARTBEAT -ErrorAction SilentlyContinue
         python -c "
 import sys
 sys.path.insert(0, r'$($projRoot -replace '\\', '/')')
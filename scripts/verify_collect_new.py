@@ -56,8 +56,7 @@ def step2_one_cycle_in_process() -> bool:
         return False
     token_addresses = token_addresses[:5]
     raw_pairs = client.get_pairs_by_token_addresses_batched(token_addresses)
-    known = db.get_known_pair_addresses()
-    processed, errors, skipped = collector.collect_from_raw_pairs(raw_pairs, known)
+    processed, errors, skipped = collector.collect_from_raw_pairs(raw_pairs)
     db.close()
 
     if processed < 0 or errors < 0 or skipped < 0:
@@ -101,8 +100,7 @@ def step4_dedup_second_run() -> bool:
     collector = Collector(client, db)
     token_addresses = client.get_latest_token_profiles()[:5]
     raw_pairs = client.get_pairs_by_token_addresses_batched(token_addresses)
-    known = db.get_known_pair_addresses()
-    processed, errors, skipped = collector.collect_from_raw_pairs(raw_pairs, known)
+    processed, errors, skipped = collector.collect_from_raw_pairs(raw_pairs)
     db.close()
 
     if len(raw_pairs) > 0 and skipped == 0: